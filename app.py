@@ -4,38 +4,42 @@ Flask Web Application for Waste Segregation System
 
 import os
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, url_for
-from werkzeug.utils import secure_filename
+import json
+import time
+from flask import Flask, Response, render_template, request, jsonify, url_for, stream_with_context
 import numpy as np
 import cv2
 from PIL import Image
 import io
 import base64
 
-# TensorFlow/Keras
-import tensorflow as tf
-from tensorflow import keras
-
-# YOLO
-from ultralytics import YOLO
+from src.archive import ArchiveError, batched, iter_archive_images
+from src.degradation import DegradationPolicy
+from src.registry import get_registry
+from src.resources import configure_threads
+from src.results_log import get_results_log
+from src.upload_store import UploadStore
+from src.utils.helpers import load_config
 
 # Configuration
 PROJECT_ROOT = Path(__file__).parent
 UPLOAD_FOLDER = PROJECT_ROOT / "static" / "uploads"
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 
-# Model paths
-YOLO_MODEL_PATH = PROJECT_ROOT / "models" / "yolo" / "waste_detector_best.pt"
-CLASSIFIER_MODEL_PATH = PROJECT_ROOT / "models" / "mobilenet" / "waste_classifier_final.keras"
-AUTOENCODER_MODEL_PATH = PROJECT_ROOT / "models" / "autoencoder" / "autoencoder_final.keras"
+# Project configuration
+CONFIG = load_config()
+
+# Split the CPU between TensorFlow, PyTorch and OpenCV before any model loads
+configure_threads(CONFIG.get('resources'))
 
 # Create Flask app
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = str(UPLOAD_FOLDER)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
 
-# Ensure upload folder exists
-UPLOAD_FOLDER.mkdir(parents=True, exist_ok=True)
+# Content-addressed upload store, kept within budget by background eviction
+upload_store = UploadStore.from_config(UPLOAD_FOLDER, CONFIG)
+upload_store.start_eviction()
 
 # Class names and disposal info
 CLASS_NAMES = ['recyclable', 'organic', 'e-waste', 'general']
@@ -71,94 +75,89 @@ DISPOSAL_INFO = {
     }
 }
 
-# Load anomaly threshold
-ANOMALY_THRESHOLD = 0.035641  # Default, will be loaded from config
+# Shared registry: loads each model/config once and hot-reloads changed files
+registry = get_registry()
+
+# Steps down to cheaper model combinations when the server is saturated
+degradation = DegradationPolicy.from_config(CONFIG)
 
-# Global model variables
-yolo_model = None
-classifier_model = None
-autoencoder_model = None
+# Optional append-only log of every result, with hourly aggregates for dashboards
+results_log = get_results_log()
 
 
 def load_models():
     """Load all models on startup."""
-    global yolo_model, classifier_model, autoencoder_model, ANOMALY_THRESHOLD
-    
     print("🔄 Loading models...")
     
-    # Load YOLO
-    if YOLO_MODEL_PATH.exists():
-        yolo_model = YOLO(str(YOLO_MODEL_PATH))
-        print("   ✅ YOLO loaded")
-    else:
-        print("   ❌ YOLO model not found")
-    
-    # Load Classifier
-    if CLASSIFIER_MODEL_PATH.exists():
-        classifier_model = keras.models.load_model(str(CLASSIFIER_MODEL_PATH))
-        print("   ✅ Classifier loaded")
-    else:
-        print("   ❌ Classifier model not found")
+    for name, label in [('detector', 'YOLO'), ('classifier', 'Classifier'),
+                        ('autoencoder', 'Autoencoder'), ('anomaly_config', 'Anomaly config')]:
+        handle = registry.get_optional(name)
+        if handle is not None:
+            print(f"   ✅ {label} loaded ({handle.version})")
+        else:
+            print(f"   ❌ {label} not found")
     
-    # Load Autoencoder
-    if AUTOENCODER_MODEL_PATH.exists():
-        autoencoder_model = keras.models.load_model(str(AUTOENCODER_MODEL_PATH))
-        print("   ✅ Autoencoder loaded")
-    else:
-        print("   ❌ Autoencoder model not found")
+    # Load lighter classifiers used at degraded levels
+    for level in degradation.levels:
+        if level.classifier_model is None:
+            continue
+        if registry.get_optional(PROJECT_ROOT / level.classifier_model) is not None:
+            print(f"   ✅ Lite classifier loaded for level '{level.name}'")
+        else:
+            print(f"   ⚠️ Lite classifier for level '{level.name}' not found, using main classifier")
     
-    # Load anomaly config
-    anomaly_config_path = PROJECT_ROOT / "models" / "autoencoder" / "anomaly_config.yaml"
-    if anomaly_config_path.exists():
-        import yaml
-        with open(anomaly_config_path, 'r') as f:
-            config = yaml.safe_load(f)
-            ANOMALY_THRESHOLD = config.get('threshold', 0.035641)
+    registry_config = CONFIG.get('registry', {})
+    if registry_config.get('hot_reload', True):
+        registry.start_watching(registry_config.get('poll_interval', 5.0))
     
     print("✅ All models loaded!")
 
 
+def current_model(name):
+    """Current version of a registry model, or None if it is not available."""
+    handle = registry.get_optional(name)
+    return handle.model if handle is not None else None
+
+
+def anomaly_threshold():
+    """Current anomaly threshold from the autoencoder's anomaly config."""
+    handle = registry.get_optional('anomaly_config')
+    if handle is not None:
+        return handle.config['threshold']
+    return CONFIG['autoencoder']['anomaly_threshold']
+
+
 def allowed_file(filename):
     """Check if file extension is allowed."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-# Flag to determine which preprocessing to use
-# Set to True after training EfficientNet and deploying it
-USE_EFFICIENTNET = True  # Change to True after EfficientNet training
+def save_upload(data, filename):
+    """Store uploaded image bytes by content hash and return the path relative to the upload folder."""
+    extension = filename.rsplit('.', 1)[1].lower()
+    return upload_store.put(data, extension)
 
 
 def preprocess_for_classifier(image, target_size=(224, 224)):
-    """Preprocess image for classifier (MobileNet or EfficientNet)."""
+    """Resize image for the classifier (normalization is built into the model)."""
     if isinstance(image, np.ndarray):
         img = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
     else:
         img = image
     
     img = img.resize(target_size, Image.Resampling.LANCZOS)
-    img_array = np.array(img, dtype=np.float32)
-    
-    if USE_EFFICIENTNET:
-        # EfficientNet preprocessing
-        from tensorflow.keras.applications.efficientnet import preprocess_input
-        img_array = np.expand_dims(img_array, axis=0)
-        return preprocess_input(img_array)
-    else:
-        # MobileNetV2 preprocessing (0-1 normalization)
-        img_array = img_array / 255.0
-        return np.expand_dims(img_array, axis=0)
+    return np.expand_dims(np.asarray(img, dtype=np.uint8), axis=0)
 
 
 def preprocess_for_autoencoder(image, target_size=(128, 128)):
-    """Preprocess image for autoencoder."""
+    """Resize image for the autoencoder (normalization is built into the model)."""
     if isinstance(image, np.ndarray):
         img = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
     else:
         img = image
     
     img = img.resize(target_size, Image.Resampling.LANCZOS)
-    img_array = np.array(img) / 255.0
-    return np.expand_dims(img_array, axis=0)
+    return np.expand_dims(np.asarray(img, dtype=np.uint8), axis=0)
 
 
 def analyze_image(image_path):
@@ -168,62 +167,99 @@ def analyze_image(image_path):
     if image is None:
         return None
     
-    result = {
+    return analyze_images([image])[0]
+
+
+def analyze_images(images):
+    """Run the analysis pipeline on a batch of BGR images in one pass per model."""
+    with degradation.track(batch_size=len(images)) as level:
+        results = run_models(images, level)
+    
+    for result in results:
+        result['degradation'] = level.to_dict()
+        if results_log is not None:
+            results_log.record(result)
+    return results
+
+
+def run_models(images, level):
+    """Run the models enabled at the given degradation level on a batch of BGR images."""
+    # Take one snapshot of each model so a hot reload mid-request is not seen
+    yolo_model = current_model('detector')
+    classifier_model = current_model('classifier')
+    autoencoder_model = current_model('autoencoder')
+    threshold = anomaly_threshold()
+    
+    model = classifier_model
+    if level.classifier_model is not None:
+        lite_model = current_model(PROJECT_ROOT / level.classifier_model)
+        if lite_model is not None:
+            model = lite_model
+    
+    results = [{
         'success': True,
         'detection': None,
         'classification': None,
         'anomaly': None,
         'disposal': None
-    }
+    } for _ in images]
     
     # 1. YOLO Detection
-    if yolo_model is not None:
-        detections = yolo_model(image, verbose=False)
-        if len(detections) > 0 and len(detections[0].boxes) > 0:
-            box = detections[0].boxes[0]
-            result['detection'] = {
-                'detected': True,
-                'confidence': float(box.conf[0]),
-                'bbox': box.xyxy[0].tolist()
-            }
-        else:
-            result['detection'] = {'detected': False, 'confidence': 0}
+    if yolo_model is not None and level.detection:
+        detections = yolo_model(list(images), verbose=False)
+        for result, detection in zip(results, detections):
+            if len(detection.boxes) > 0:
+                box = detection.boxes[0]
+                result['detection'] = {
+                    'detected': True,
+                    'confidence': float(box.conf[0]),
+                    'bbox': box.xyxy[0].tolist()
+                }
+            else:
+                result['detection'] = {'detected': False, 'confidence': 0}
     
-    # 2. Classification
-    if classifier_model is not None:
-        img_processed = preprocess_for_classifier(image)
-        predictions = classifier_model.predict(img_processed, verbose=0)
-        class_idx = np.argmax(predictions[0])
-        confidence = float(predictions[0][class_idx])
-        waste_type = CLASS_NAMES[class_idx]
+    # 2. Classification (a lighter model may stand in at degraded levels)
+    if model is not None:
+        if model is classifier_model:
+            target_size = (224, 224)
+        else:
+            target_size = (level.classifier_size, level.classifier_size)
+        batch = np.concatenate([preprocess_for_classifier(image, target_size) for image in images])
+        predictions = model.predict(batch, verbose=0)
         
-        result['classification'] = {
-            'waste_type': waste_type,
-            'confidence': confidence,
-            'all_probabilities': {
-                CLASS_NAMES[i]: float(predictions[0][i]) 
-                for i in range(len(CLASS_NAMES))
+        for result, probs in zip(results, predictions):
+            class_idx = np.argmax(probs)
+            confidence = float(probs[class_idx])
+            waste_type = CLASS_NAMES[class_idx]
+            
+            result['classification'] = {
+                'waste_type': waste_type,
+                'confidence': confidence,
+                'all_probabilities': {
+                    CLASS_NAMES[i]: float(probs[i]) 
+                    for i in range(len(CLASS_NAMES))
+                }
             }
-        }
-        
-        # Get disposal info
-        result['disposal'] = DISPOSAL_INFO[waste_type]
+            
+            # Get disposal info
+            result['disposal'] = DISPOSAL_INFO[waste_type]
     
     # 3. Anomaly Detection
-    if autoencoder_model is not None:
-        img_processed = preprocess_for_autoencoder(image)
-        reconstructed = autoencoder_model.predict(img_processed, verbose=0)
-        mse = np.mean((img_processed - reconstructed) ** 2)
-        is_anomaly = mse > ANOMALY_THRESHOLD
+    if autoencoder_model is not None and level.anomaly:
+        # The autoencoder scores its own reconstruction error per image
+        batch = np.concatenate([preprocess_for_autoencoder(image) for image in images])
+        errors = autoencoder_model.predict(batch, verbose=0)
         
-        result['anomaly'] = {
-            'is_anomaly': bool(is_anomaly),
-            'reconstruction_error': float(mse),
-            'threshold': ANOMALY_THRESHOLD,
-            'score': float(mse / ANOMALY_THRESHOLD)
-        }
+        for result, mse in zip(results, errors):
+            is_anomaly = mse > threshold
+            result['anomaly'] = {
+                'is_anomaly': bool(is_anomaly),
+                'reconstruction_error': float(mse),
+                'threshold': threshold,
+                'score': float(mse / threshold)
+            }
     
-    return result
+    return results
 
 
 @app.route('/')
@@ -247,12 +283,10 @@ def analyze():
         return jsonify({'error': 'Invalid file type'}), 400
     
     # Save file
-    filename = secure_filename(file.filename)
-    filepath = Path(app.config['UPLOAD_FOLDER']) / filename
-    file.save(str(filepath))
+    filename = save_upload(file.read(), file.filename)
     
     # Analyze
-    result = analyze_image(filepath)
+    result = analyze_image(UPLOAD_FOLDER / filename)
     
     if result is None:
         return jsonify({'error': 'Failed to process image'}), 500
@@ -263,6 +297,106 @@ def analyze():
     return jsonify(result)
 
 
+@app.route('/analyze/archive', methods=['POST'])
+def analyze_archive():
+    """
+    Analyze every image in an uploaded zip/tar archive.
+    
+    Accepts the archive as a multipart 'file' field or as the raw request
+    body, and streams one NDJSON line per image followed by a summary line.
+    """
+    archive_config = CONFIG.get('archive', {})
+    request.max_content_length = archive_config.get('max_archive_size', 2 * 1024 ** 3)
+    
+    if 'file' in request.files:
+        stream = request.files['file'].stream
+    else:
+        stream = request.stream
+    
+    batch_size = archive_config.get('batch_size', 16)
+    max_member_size = archive_config.get('max_member_size', 16 * 1024 * 1024)
+    
+    def decoded_members(summary):
+        """Decode archive members, emitting error lines for the ones that fail."""
+        try:
+            for name, data, error in iter_archive_images(stream, max_member_size=max_member_size):
+                image = None
+                if error is None:
+                    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+                    if image is None:
+                        error = 'Failed to decode image'
+                if error is not None:
+                    summary['failed'] += 1
+                    yield name, None, error
+                else:
+                    yield name, image, None
+        except ArchiveError as e:
+            # Return normally so batched() still flushes the members read so far
+            summary['error'] = str(e)
+    
+    def generate():
+        summary = {'summary': True, 'images': 0, 'analyzed': 0, 'failed': 0}
+        try:
+            for batch in batched(decoded_members(summary), batch_size):
+                # Failed members are reported in order with their batch
+                good = [(name, image) for name, image, error in batch if error is None]
+                batch_error = None
+                try:
+                    results = iter(analyze_images([image for _, image in good])) if good else iter(())
+                except Exception as e:
+                    # Report the whole batch as failed and carry on with the next one
+                    batch_error = f'Analysis failed: {e}'
+                for name, image, error in batch:
+                    summary['images'] += 1
+                    error = error or batch_error
+                    if error is not None:
+                        line = {'file': name, 'success': False, 'error': error}
+                        if error is batch_error:
+                            summary['failed'] += 1
+                    else:
+                        line = dict(next(results), file=name)
+                        summary['analyzed'] += 1
+                    yield json.dumps(line) + '\n'
+        except Exception as e:
+            # The summary line is always the last line of the stream
+            summary['error'] = f'Analysis aborted: {e}'
+        yield json.dumps(summary) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/metrics')
+def metrics():
+    """Serving metrics (degradation level and its changes, model versions, upload store and results log)."""
+    return jsonify({
+        'degradation': degradation.metrics(),
+        'model_versions': registry.versions(),
+        'uploads': upload_store.stats(),
+        'results_log': results_log.stats() if results_log is not None else None
+    })
+
+
+@app.route('/results/summary')
+def results_summary():
+    """Per-class counts, anomaly rates and confidence histograms from the results log."""
+    if results_log is None:
+        return jsonify({'error': 'Results log is disabled'}), 404
+    
+    try:
+        days = float(request.args.get('days', 30))
+    except ValueError:
+        days = None
+    if days is None or not 0 <= days < float('inf'):
+        return jsonify({'error': 'days must be a non-negative number'}), 400
+    
+    end = time.time()
+    start = end - days * 86400
+    return jsonify({
+        'summary': results_log.summary(start, end),
+        'hourly': results_log.hourly_counts(start, end)
+    })
+
+
 @app.route('/result')
 def result():
     """Result page (for non-AJAX fallback)."""
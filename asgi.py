@@ -0,0 +1,156 @@
+"""
+Async (ASGI) Entry Point for the Waste Segregation System
+
+Serves the same /analyze contract as app.py, but runs inference on a bounded
+executor and sheds load with 429/503 + Retry-After instead of letting requests
+pile up inside the server.
+
+Run with:
+    uvicorn asgi:asgi_app --host 0.0.0.0 --port 5000
+"""
+
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+# Importing app loads the models once and shares the analysis code with Flask
+import app as flask_app
+from src.serving import AdmissionController, ClientDisconnected, Overloaded
+from src.utils.helpers import load_config
+
+
+admission = AdmissionController.from_config(load_config())
+
+# Same upload limit as the Flask app
+MAX_CONTENT_LENGTH = flask_app.app.config['MAX_CONTENT_LENGTH']
+
+# Requests waiting for a worker count towards the degradation policy's queue depth
+flask_app.degradation.queue_depth_fn = lambda: admission.queue_depth
+
+
+def _process_upload(data, filename):
+    """Save and analyze an upload (runs on the inference executor)."""
+    filename = flask_app.save_upload(data, filename)
+    result = flask_app.analyze_image(flask_app.UPLOAD_FOLDER / filename)
+    return result, filename
+
+
+class _BodyTooLarge(Exception):
+    """Raised while reading a request body that exceeds MAX_CONTENT_LENGTH."""
+
+
+def _limit_body(receive, limit):
+    """Wrap an ASGI receive channel so reading more than ``limit`` bytes fails."""
+    received = 0
+
+    async def limited_receive():
+        nonlocal received
+        message = await receive()
+        if message['type'] == 'http.request':
+            received += len(message.get('body', b''))
+            if received > limit:
+                raise _BodyTooLarge()
+        return message
+
+    return limited_receive
+
+
+def _overloaded(e):
+    """Response for a request rejected by admission control."""
+    return JSONResponse(
+        {'error': e.reason},
+        status_code=e.status_code,
+        headers={'Retry-After': str(e.retry_after)}
+    )
+
+
+async def analyze(request):
+    """Analyze uploaded image."""
+    # Shed load before the upload is read, so rejected bodies are never buffered
+    try:
+        reservation = admission.reserve()
+    except Overloaded as e:
+        return _overloaded(e)
+
+    with reservation:
+        content_length = request.headers.get('content-length')
+        if content_length and content_length.isdigit() and int(content_length) > MAX_CONTENT_LENGTH:
+            return JSONResponse({'error': 'File too large'}, status_code=413)
+
+        # Chunked uploads carry no Content-Length; count the bytes as they arrive
+        request = Request(request.scope, _limit_body(request.receive, MAX_CONTENT_LENGTH))
+        try:
+            form = await request.form()
+        except _BodyTooLarge:
+            return JSONResponse({'error': 'File too large'}, status_code=413)
+
+        if 'file' not in form:
+            return JSONResponse({'error': 'No file uploaded'}, status_code=400)
+
+        file = form['file']
+
+        if not getattr(file, 'filename', ''):
+            return JSONResponse({'error': 'No file selected'}, status_code=400)
+
+        if not flask_app.allowed_file(file.filename):
+            return JSONResponse({'error': 'Invalid file type'}, status_code=400)
+
+        data = await file.read()
+
+        try:
+            result, filename = await admission.run(
+                _process_upload, data, file.filename,
+                is_disconnected=request.is_disconnected,
+                reservation=reservation
+            )
+        except Overloaded as e:
+            return _overloaded(e)
+        except ClientDisconnected:
+            # Nobody is listening any more; 499 mirrors nginx's "client closed request"
+            return Response(status_code=499)
+
+    if result is None:
+        return JSONResponse({'error': 'Failed to process image'}, status_code=500)
+
+    # Add image URL to result
+    result['image_url'] = f'/static/uploads/{filename}'
+
+    return JSONResponse(result)
+
+
+async def health(request):
+    """Report admission queue state."""
+    return JSONResponse({
+        'workers': admission.workers,
+        'in_flight': admission.in_flight,
+        'queue_depth': admission.queue_depth,
+        'queue_size': admission.queue_size,
+        'stats': admission.stats,
+        'degradation': flask_app.degradation.metrics()
+    })
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Drain the inference executor on shutdown."""
+    yield
+    admission.shutdown()
+
+
+asgi_app = Starlette(
+    routes=[
+        Route('/analyze', analyze, methods=['POST']),
+        Route('/health', health),
+        Mount('/static', app=StaticFiles(directory=str(flask_app.PROJECT_ROOT / 'static')), name='static')
+    ],
+    lifespan=lifespan
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(asgi_app, host='0.0.0.0', port=5000)
@@ -5,11 +5,9 @@ Autoencoder Anomaly Detection Utilities for Waste Segregation System
 
 import numpy as np
 from pathlib import Path
-import yaml
 import cv2
 
-import tensorflow as tf
-from tensorflow import keras
+from src.registry import get_registry
 
 
 class AnomalyDetector:
@@ -25,17 +23,34 @@ class AnomalyDetector:
             model_path: Path to the trained autoencoder model
             config_path: Path to anomaly config YAML file
         """
-        self.model = keras.models.load_model(str(model_path))
+        self.registry = get_registry()
+        self.model_path = model_path
+        self.config_path = None
 
-        # Load config
+        # Load model and config through the shared registry
+        self.registry.get(model_path)
         if config_path and Path(config_path).exists():
-            with open(config_path, "r") as f:
-                config = yaml.safe_load(f)
-                self.threshold = config["threshold"]
-                self.image_size = tuple(config["image_size"])
-        else:
-            self.threshold = 0.02
-            self.image_size = (128, 128)
+            self.config_path = config_path
+            self.registry.get(config_path)
+
+    @property
+    def model(self):
+        """Current autoencoder model (follows hot reloads)."""
+        return self.registry.get(self.model_path).model
+
+    @property
+    def threshold(self):
+        """Current anomaly threshold (follows hot reloads)."""
+        if self.config_path is None:
+            return 0.02
+        return self.registry.get(self.config_path).config["threshold"]
+
+    @property
+    def image_size(self):
+        """Autoencoder input size."""
+        if self.config_path is None:
+            return (128, 128)
+        return tuple(self.registry.get(self.config_path).config["image_size"])
 
     def preprocess_image(self, image):
         """
@@ -45,7 +60,7 @@ class AnomalyDetector:
             image: numpy array (BGR or RGB) or path to image
 
         Returns:
-            Preprocessed image array
+            Resized uint8 image array
         """
         if isinstance(image, (str, Path)):
             img = cv2.imread(str(image))
@@ -55,8 +70,8 @@ class AnomalyDetector:
             if len(img.shape) == 3 and img.shape[-1] == 3:
                 img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
 
+        # uint8 pixels; the model normalizes internally
         img = cv2.resize(img, self.image_size)
-        img = img.astype(np.float32) / 255.0
 
         return img
 
@@ -73,8 +88,8 @@ class AnomalyDetector:
         img = self.preprocess_image(image)
         img = np.expand_dims(img, axis=0)
 
-        reconstructed = self.model.predict(img, verbose=0)
-        error = np.mean((img - reconstructed) ** 2)
+        # The model outputs the reconstruction error itself
+        error = self.model.predict(img, verbose=0)[0]
 
         return float(error)
 
@@ -89,13 +104,14 @@ class AnomalyDetector:
             Dictionary with is_anomaly flag and reconstruction error
         """
         error = self.get_reconstruction_error(image)
-        is_anomaly = error > self.threshold
+        threshold = self.threshold
+        is_anomaly = error > threshold
 
         return {
             "is_anomaly": bool(is_anomaly),
             "reconstruction_error": error,
-            "threshold": self.threshold,
-            "anomaly_score": error / self.threshold  # >1 means anomaly
+            "threshold": threshold,
+            "anomaly_score": error / threshold  # >1 means anomaly
         }
 
     def detect_batch(self, images):
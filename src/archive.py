@@ -0,0 +1,175 @@
+"""
+Streaming Archive Reader for Bulk Image Uploads
+"""
+
+import tarfile
+import tempfile
+import zipfile
+import zlib
+from pathlib import PurePosixPath
+
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+
+ZIP_MAGIC = b"PK\x03\x04"
+
+
+class ArchiveError(Exception):
+    """
+    Raised when an upload is not a readable zip or tar archive.
+    """
+
+
+class _PrefixedStream:
+    """
+    Read-only stream that replays already-consumed bytes before the rest.
+
+    Lets the format sniffing read the magic bytes of a non-seekable request
+    stream without losing them.
+    """
+
+    def __init__(self, prefix, stream):
+        self._prefix = prefix
+        self._stream = stream
+
+    def read(self, size=-1):
+        if not self._prefix:
+            return self._stream.read(size)
+
+        if size is None or size < 0:
+            data, self._prefix = self._prefix + self._stream.read(), b""
+            return data
+
+        data, self._prefix = self._prefix[:size], self._prefix[size:]
+        if len(data) < size:
+            data += self._stream.read(size - len(data))
+        return data
+
+
+def _is_image(name):
+    """Whether an archive member looks like an image worth analyzing."""
+    path = PurePosixPath(name)
+    if path.name.startswith(".") or "__MACOSX" in path.parts:
+        return False
+    return path.suffix.lower() in IMAGE_EXTENSIONS
+
+
+def iter_archive_images(stream, max_member_size=16 * 1024 * 1024, spool_size=64 * 1024 * 1024):
+    """
+    Yield image members of a zip or tar archive one at a time.
+
+    Tar archives (optionally gzip/bz2/xz compressed) are read straight off the
+    stream. Zip archives keep their index at the end: a seekable zip stream
+    (such as a multipart upload, which is already spooled) is read in place,
+    and a non-seekable one is first spooled (in memory up to ``spool_size``,
+    then to a temporary file). Members are never extracted to disk, and only one
+    member's bytes are held in memory at a time.
+
+    Args:
+        stream: Binary file-like object with the archive contents
+        max_member_size: Members larger than this are reported, not read
+        spool_size: Bytes of a non-seekable zip kept in memory before spilling
+
+    Yields:
+        Tuples of (member_name, data, error); exactly one of data/error is None
+
+    Raises:
+        ArchiveError: If the stream is neither a zip nor a tar archive
+    """
+    start = stream.tell() if _seekable(stream) else None
+    magic = stream.read(4)
+
+    if magic == ZIP_MAGIC:
+        if start is not None:
+            stream.seek(start)
+            yield from _read_zip(stream, max_member_size)
+        else:
+            yield from _iter_zip(_PrefixedStream(magic, stream), max_member_size, spool_size)
+    else:
+        yield from _iter_tar(_PrefixedStream(magic, stream), max_member_size)
+
+
+def _seekable(stream):
+    """Whether a file-like object supports seeking."""
+    try:
+        return stream.seekable()
+    except (AttributeError, ValueError):
+        return False
+
+
+def _iter_zip(stream, max_member_size, spool_size):
+    """Yield image members of a non-seekable zip stream by spooling it first."""
+    with tempfile.SpooledTemporaryFile(max_size=spool_size) as spool:
+        while True:
+            chunk = stream.read(1024 * 1024)
+            if not chunk:
+                break
+            spool.write(chunk)
+        spool.seek(0)
+
+        yield from _read_zip(spool, max_member_size)
+
+
+def _read_zip(fileobj, max_member_size):
+    """Yield image members of a zip archive in a seekable file."""
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile as e:
+        raise ArchiveError(f"Invalid zip archive: {e}")
+
+    with archive:
+        for info in archive.infolist():
+            if info.is_dir() or not _is_image(info.filename):
+                continue
+            if info.file_size > max_member_size:
+                yield info.filename, None, "Image too large"
+                continue
+            try:
+                with archive.open(info) as member:
+                    data = member.read()
+            except (zipfile.BadZipFile, RuntimeError, zlib.error, EOFError, OSError) as e:
+                # Corrupt, truncated or encrypted member; the rest may be fine
+                yield info.filename, None, f"Unreadable member: {e}"
+                continue
+            yield info.filename, data, None
+
+
+def _iter_tar(stream, max_member_size):
+    """Yield image members of a (possibly compressed) tar archive, streaming."""
+    try:
+        archive = tarfile.open(fileobj=stream, mode="r|*")
+    except tarfile.TarError as e:
+        raise ArchiveError(f"Upload is not a zip or tar archive: {e}")
+
+    with archive:
+        try:
+            for member in archive:
+                if not member.isfile() or not _is_image(member.name):
+                    continue
+                if member.size > max_member_size:
+                    yield member.name, None, "Image too large"
+                    continue
+                yield member.name, archive.extractfile(member).read(), None
+        except (tarfile.TarError, zlib.error, EOFError, OSError) as e:
+            raise ArchiveError(f"Corrupt tar archive: {e}")
+
+
+def batched(items, batch_size):
+    """
+    Group an iterable into lists of at most ``batch_size`` items.
+
+    Args:
+        items: Any iterable
+        batch_size: Maximum items per batch
+
+    Yields:
+        Lists of items
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -5,10 +5,8 @@ MobileNet Classification Utilities for Waste Segregation System
 
 import numpy as np
 from pathlib import Path
-import yaml
 
-import tensorflow as tf
-from tensorflow import keras
+from src.registry import get_registry
 
 
 class WasteClassifier:
@@ -25,15 +23,28 @@ class WasteClassifier:
             class_mapping_path: Path to class mapping YAML file
             image_size: Input image size (height, width)
         """
-        self.model = keras.models.load_model(str(model_path))
+        self.registry = get_registry()
+        self.model_path = model_path
+        self.class_mapping_path = None
         self.image_size = image_size
 
-        # Load class mapping
+        # Load model and class mapping through the shared registry
+        self.registry.get(model_path)
         if class_mapping_path and Path(class_mapping_path).exists():
-            with open(class_mapping_path, "r") as f:
-                self.class_names = yaml.safe_load(f)
-        else:
-            self.class_names = {0: "recyclable", 1: "organic", 2: "e-waste", 3: "general"}
+            self.class_mapping_path = class_mapping_path
+            self.registry.get(class_mapping_path)
+
+    @property
+    def model(self):
+        """Current classifier model (follows hot reloads)."""
+        return self.registry.get(self.model_path).model
+
+    @property
+    def class_names(self):
+        """Class id to name mapping."""
+        if self.class_mapping_path is None:
+            return {0: "recyclable", 1: "organic", 2: "e-waste", 3: "general"}
+        return self.registry.get(self.class_mapping_path).config
 
     def preprocess_image(self, image):
         """
@@ -43,7 +54,7 @@ class WasteClassifier:
             image: numpy array (BGR or RGB) or path to image
 
         Returns:
-            Preprocessed image array
+            Resized uint8 image array
         """
         import cv2
 
@@ -55,8 +66,8 @@ class WasteClassifier:
             if img.shape[-1] == 3 and len(img.shape) == 3:
                 img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
 
+        # uint8 pixels; the model normalizes internally
         img = cv2.resize(img, self.image_size)
-        img = img.astype(np.float32) / 255.0
 
         return img
 
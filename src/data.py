@@ -0,0 +1,370 @@
+"""
+Training Input Pipeline for the Waste Segregation System
+
+Builds tf.data pipelines for the classifier and autoencoder from
+config/config.yaml. On first use each split is decoded once, resized and
+written to sharded TFRecord files of raw uint8 pixels; later epochs and later
+runs read those shards and skip JPEG decoding entirely. Augmentation runs on
+whole batches.
+
+Usage (in a notebook):
+    from src.data import build_dataset
+    train_ds = build_dataset("train", task="classifier")
+    val_ds = build_dataset("val", task="classifier")
+    model.fit(train_ds, validation_data=val_ds, epochs=EPOCHS)
+
+Throughput report:
+    python -m src.data report --task classifier --split train
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from pathlib import Path
+
+import tensorflow as tf
+from tensorflow import keras
+
+from src.utils.helpers import get_project_root, load_config
+
+
+AUTOTUNE = tf.data.AUTOTUNE
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+
+def _task_settings(config, task):
+    """Image size, batch size and source folder for a task."""
+    if task == "classifier":
+        size = config["dataset"]["image_size"]
+        batch_size = config["mobilenet"]["batch_size"]
+    elif task == "autoencoder":
+        size = config["autoencoder"]["input_shape"][0]
+        batch_size = config["autoencoder"]["batch_size"]
+    else:
+        raise ValueError(f"Unknown task: {task}")
+    return size, batch_size
+
+
+def list_images(split, config=None):
+    """
+    Image paths and class indices of a split.
+
+    Args:
+        split: "train", "val" or "test"
+        config: Configuration dictionary (loaded if None)
+
+    Returns:
+        Tuple of (list of paths, list of class indices)
+    """
+    config = config or load_config()
+    root = get_project_root() / config["paths"]["datasets"]["processed"] / split / "classification"
+
+    paths, labels = [], []
+    for class_idx, class_name in enumerate(config["categories"]["classification"]):
+        class_dir = root / class_name
+        if not class_dir.exists():
+            continue
+        for path in sorted(class_dir.iterdir()):
+            if path.suffix.lower() in IMAGE_EXTENSIONS:
+                paths.append(str(path))
+                labels.append(class_idx)
+    return paths, labels
+
+
+def _fingerprint(paths, labels):
+    """
+    Fingerprint of the source images, to detect a stale cache.
+
+    Hashes every (path, label, mtime, size), so a file moved to another class
+    folder (which keeps its mtime) invalidates the cache as well as an edit.
+    """
+    digest = hashlib.sha256()
+    for path, label in sorted(zip(paths, labels)):
+        st = os.stat(path)
+        digest.update(f"{path}\0{label}\0{st.st_mtime_ns}\0{st.st_size}\n".encode())
+    return {"count": len(paths), "fingerprint": digest.hexdigest()}
+
+
+def _decode(path, label, size):
+    """Read, decode and resize one image to uint8."""
+    image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+    image = tf.image.resize(image, [size, size])
+    return tf.cast(tf.round(tf.clip_by_value(image, 0, 255)), tf.uint8), label
+
+
+def _serialize(image, label):
+    """Encode one example as a tf.train.Example of raw bytes."""
+    feature = {
+        "image": tf.train.Feature(bytes_list=tf.train.BytesList(value=[image.tobytes()])),
+        "label": tf.train.Feature(int64_list=tf.train.Int64List(value=[int(label)]))
+    }
+    return tf.train.Example(features=tf.train.Features(feature=feature)).SerializeToString()
+
+
+def write_cache(split, size, cache_dir, config=None, shard_size=1024):
+    """
+    Decode a split once and write it as sharded TFRecords of uint8 pixels.
+
+    Args:
+        split: "train", "val" or "test"
+        size: Square image size to store
+        cache_dir: Output folder for the shards
+        config: Configuration dictionary (loaded if None)
+        shard_size: Examples per shard
+
+    Returns:
+        Manifest dictionary
+    """
+    paths, labels = list_images(split, config)
+    if not paths:
+        raise FileNotFoundError(f"No images found for split '{split}'")
+
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for stale in cache_dir.glob("shard-*.tfrecord"):
+        stale.unlink()
+
+    # Decoding runs in parallel inside tf.data; only serialization is serial
+    decoded = (
+        tf.data.Dataset.from_tensor_slices((paths, labels))
+        .map(lambda p, l: _decode(p, l, size), num_parallel_calls=AUTOTUNE)
+        .prefetch(AUTOTUNE)
+    )
+
+    num_shards = math.ceil(len(paths) / shard_size)
+    writer = None
+    for i, (image, label) in enumerate(decoded.as_numpy_iterator()):
+        if i % shard_size == 0:
+            if writer is not None:
+                writer.close()
+            shard = cache_dir / f"shard-{i // shard_size:05d}-of-{num_shards:05d}.tfrecord"
+            writer = tf.io.TFRecordWriter(str(shard))
+        writer.write(_serialize(image, label))
+    writer.close()
+
+    manifest = {"split": split, "size": size, "shards": num_shards, **_fingerprint(paths, labels)}
+    with open(cache_dir / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _cache_is_fresh(cache_dir, split, size, config):
+    """Whether the shards in cache_dir match the current source images."""
+    manifest_path = Path(cache_dir) / "manifest.json"
+    if not manifest_path.exists():
+        return False
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    paths, labels = list_images(split, config)
+    current = _fingerprint(paths, labels)
+    return (manifest.get("size") == size
+            and manifest.get("fingerprint") == current["fingerprint"]
+            and manifest.get("count") == current["count"])
+
+
+def _parse(record, size):
+    """Parse one cached example back to a uint8 image and label."""
+    features = tf.io.parse_single_example(record, {
+        "image": tf.io.FixedLenFeature([], tf.string),
+        "label": tf.io.FixedLenFeature([], tf.int64)
+    })
+    image = tf.reshape(tf.io.decode_raw(features["image"], tf.uint8), [size, size, 3])
+    return image, features["label"]
+
+
+def build_augmentation(config):
+    """
+    Batch augmentation from the ``augmentation`` block of config.yaml.
+
+    Args:
+        config: Configuration dictionary
+
+    Returns:
+        Function mapping a float32 image batch (0-255) to an augmented batch
+    """
+    aug = config.get("augmentation", {})
+    fill_mode = aug.get("fill_mode", "nearest")
+
+    layers = []
+    if aug.get("horizontal_flip") and aug.get("vertical_flip"):
+        layers.append(keras.layers.RandomFlip("horizontal_and_vertical"))
+    elif aug.get("horizontal_flip"):
+        layers.append(keras.layers.RandomFlip("horizontal"))
+    elif aug.get("vertical_flip"):
+        layers.append(keras.layers.RandomFlip("vertical"))
+    if aug.get("rotation_range"):
+        layers.append(keras.layers.RandomRotation(aug["rotation_range"] / 360.0, fill_mode=fill_mode))
+    if aug.get("width_shift_range") or aug.get("height_shift_range"):
+        layers.append(keras.layers.RandomTranslation(
+            aug.get("height_shift_range", 0.0), aug.get("width_shift_range", 0.0), fill_mode=fill_mode
+        ))
+    if aug.get("zoom_range"):
+        layers.append(keras.layers.RandomZoom(aug["zoom_range"], fill_mode=fill_mode))
+
+    pipeline = keras.Sequential(layers, name="augmentation")
+    brightness = aug.get("brightness_range")
+
+    def augment(images):
+        images = pipeline(images, training=True)
+        if brightness:
+            # One multiplicative factor per image, as ImageDataGenerator does
+            factors = tf.random.uniform([tf.shape(images)[0], 1, 1, 1], brightness[0], brightness[1])
+            images = tf.clip_by_value(images * factors, 0.0, 255.0)
+        return images
+
+    return augment
+
+
+def build_dataset(split, task="classifier", config=None, training=None, batch_size=None,
+                  shuffle_buffer=None):
+    """
+    Build the input pipeline for a split, creating the shard cache if needed.
+
+    Classifier batches are (images, one-hot labels) with images normalized as
+    ``preprocessing.classifier`` expects; autoencoder batches are (images,
+    images) scaled to 0-1.
+
+    Args:
+        split: "train", "val" or "test"
+        task: "classifier" or "autoencoder"
+        config: Configuration dictionary (loaded if None)
+        training: Shuffle and augment (defaults to split == "train")
+        batch_size: Override the batch size from config
+        shuffle_buffer: Override the shuffle buffer from config
+
+    Returns:
+        tf.data.Dataset
+    """
+    config = config or load_config()
+    data_config = config.get("data", {})
+    size, default_batch_size = _task_settings(config, task)
+    batch_size = batch_size or default_batch_size
+    training = split == "train" if training is None else training
+    shuffle_buffer = shuffle_buffer or data_config.get("shuffle_buffer", 1000)
+
+    cache_dir = get_project_root() / data_config.get("cache_dir", "datasets/cache") / f"{split}_{size}"
+    if not _cache_is_fresh(cache_dir, split, size, config):
+        print(f"🔄 Caching {split} split at {size}x{size} to {cache_dir}...")
+        write_cache(split, size, cache_dir, config, data_config.get("shard_size", 1024))
+
+    files = sorted(str(p) for p in cache_dir.glob("shard-*.tfrecord"))
+    ds = tf.data.Dataset.from_tensor_slices(files)
+    if training:
+        ds = ds.shuffle(len(files))
+    ds = ds.interleave(tf.data.TFRecordDataset, num_parallel_calls=AUTOTUNE,
+                       deterministic=not training)
+    ds = ds.map(lambda r: _parse(r, size), num_parallel_calls=AUTOTUNE)
+    if training:
+        ds = ds.shuffle(shuffle_buffer)
+    ds = ds.batch(batch_size, drop_remainder=training)
+
+    augment = build_augmentation(config) if training else None
+    num_classes = len(config["categories"]["classification"])
+    preprocessing = config.get("preprocessing", {}).get("classifier", "efficientnet")
+
+    def prepare(images, labels):
+        images = tf.cast(images, tf.float32)
+        if augment is not None:
+            images = augment(images)
+        if task == "autoencoder":
+            images = images / 255.0
+            return images, images
+        if preprocessing == "unit":
+            images = images / 255.0
+        return images, tf.one_hot(labels, num_classes)
+
+    ds = ds.map(prepare, num_parallel_calls=AUTOTUNE)
+    return ds.prefetch(AUTOTUNE)
+
+
+def _float_model(task):
+    """Load the float32 model for a task (the pre-export backup if exported)."""
+    if task == "classifier":
+        path = get_project_root() / "models" / "mobilenet" / "waste_classifier_final.keras"
+        loss = "categorical_crossentropy"
+    else:
+        path = get_project_root() / "models" / "autoencoder" / "autoencoder_final.keras"
+        loss = "mse"
+
+    backup = path.with_suffix(".float32.keras")
+    model = keras.models.load_model(str(backup if backup.exists() else path))
+    model.compile(optimizer="adam", loss=loss)
+    return model
+
+
+def throughput_report(split="train", task="classifier", steps=50, config=None):
+    """
+    Compare input-pipeline throughput with model training throughput.
+
+    Args:
+        split: Split to read
+        task: "classifier" or "autoencoder"
+        steps: Batches to time for each measurement
+        config: Configuration dictionary (loaded if None)
+
+    Returns:
+        Dictionary with images/second for the input pipeline and the model
+    """
+    config = config or load_config()
+    ds = build_dataset(split, task, config, training=True)
+
+    # Input pipeline alone (after one warm-up batch)
+    iterator = iter(ds.repeat())
+    images, targets = next(iterator)
+    batch_size = int(images.shape[0])
+    start = time.perf_counter()
+    for _ in range(steps):
+        next(iterator)
+    input_rate = steps * batch_size / (time.perf_counter() - start)
+
+    # Model alone, training on one fixed batch so no input work is involved
+    model = _float_model(task)
+    model.train_on_batch(images, targets)
+    start = time.perf_counter()
+    for _ in range(steps):
+        model.train_on_batch(images, targets)
+    model_rate = steps * batch_size / (time.perf_counter() - start)
+
+    return {
+        "task": task,
+        "split": split,
+        "batch_size": batch_size,
+        "input_images_per_sec": input_rate,
+        "model_images_per_sec": model_rate,
+        "bottleneck": "input pipeline" if input_rate < model_rate else "model"
+    }
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Training input pipeline tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    cache = subparsers.add_parser("cache", help="Build the shard cache for a split")
+    cache.add_argument("--task", default="classifier", choices=["classifier", "autoencoder"])
+    cache.add_argument("--split", default="train")
+
+    report = subparsers.add_parser("report", help="Input pipeline vs model throughput")
+    report.add_argument("--task", default="classifier", choices=["classifier", "autoencoder"])
+    report.add_argument("--split", default="train")
+    report.add_argument("--steps", type=int, default=50)
+
+    args = parser.parse_args()
+
+    if args.command == "cache":
+        build_dataset(args.split, args.task)
+        print("✅ Cache ready")
+        return
+
+    result = throughput_report(args.split, args.task, args.steps)
+    print(f"📊 Throughput ({result['task']}, {result['split']}, batch {result['batch_size']}):")
+    print(f"   Input pipeline: {result['input_images_per_sec']:.1f} images/s")
+    print(f"   Model training: {result['model_images_per_sec']:.1f} images/s")
+    print(f"   Bottleneck: {result['bottleneck']}")
+
+
+if __name__ == "__main__":
+    main()
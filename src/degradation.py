@@ -0,0 +1,249 @@
+"""
+Load-Aware Graceful Degradation for the Waste Segregation System
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+# Used when config.yaml has no degradation block
+DEFAULT_LEVELS = [
+    {"name": "full", "detection": True, "anomaly": True},
+    {"name": "no_detection", "detection": False, "anomaly": True},
+    {"name": "classifier_only", "detection": False, "anomaly": False}
+]
+
+
+class DegradationLevel:
+    """
+    One step of the degradation ladder: which models run at this level.
+    """
+
+    def __init__(self, index, name, detection=True, anomaly=True,
+                 classifier_model=None, classifier_size=None):
+        """
+        Args:
+            index: Position on the ladder (0 = full quality)
+            name: Level name reported in responses and metrics
+            detection: Whether YOLO detection runs
+            anomaly: Whether the autoencoder runs
+            classifier_model: Optional path to a lighter classifier
+            classifier_size: Input size (pixels) of the lighter classifier
+        """
+        self.index = index
+        self.name = name
+        self.detection = detection
+        self.anomaly = anomaly
+        self.classifier_model = classifier_model
+        self.classifier_size = classifier_size
+
+    def to_dict(self):
+        """Summary of the level for API responses."""
+        return {"level": self.index, "name": self.name}
+
+
+class DegradationPolicy:
+    """
+    Steps down through the configured levels when the recent p95 latency or
+    the number of in-flight requests crosses the step-down threshold, and
+    back up once load has fallen: the queue depth is at most half the
+    step-down depth and the current p95, scaled by how much more the next
+    level up costs per image, would stay under the step-up threshold.
+    Without that scaling a cheaper level always looks fast enough to leave,
+    and the ladder flaps under constant overload.
+
+    Latency samples are cleared on every level change so each decision is
+    based on traffic served at the current level, and a cooldown between
+    changes keeps the ladder from oscillating.
+    """
+
+    def __init__(self, levels=None, window=50, min_samples=10, step_down_p95=1.5,
+                 step_up_p95=0.5, step_down_in_flight=None, cooldown=5.0,
+                 queue_depth_fn=None):
+        """
+        Initialize the policy.
+
+        Args:
+            levels: List of level dicts (name, detection, anomaly, classifier_model,
+                classifier_size), ordered from full quality to cheapest
+            window: Number of recent latencies used for the p95 estimate
+            min_samples: Samples needed at a level before stepping on latency
+            step_down_p95: p95 latency (seconds) above which to step down
+            step_up_p95: p95 latency (seconds) the next level up is projected to
+                stay below before stepping back up
+            step_down_in_flight: Queue depth above which to step down (None disables)
+            cooldown: Minimum seconds between level changes
+            queue_depth_fn: Optional callable returning requests waiting upstream
+                (e.g. the ASGI admission queue), added to the in-flight count
+        """
+        levels = levels or DEFAULT_LEVELS
+        self.levels = [DegradationLevel(i, **level) for i, level in enumerate(levels)]
+        self.min_samples = min_samples
+        self.step_down_p95 = step_down_p95
+        self.step_up_p95 = step_up_p95
+        self.step_down_in_flight = step_down_in_flight
+        self.cooldown = cooldown
+        self.queue_depth_fn = queue_depth_fn
+
+        self._lock = threading.Lock()
+        self._index = 0
+        self._in_flight = 0
+        self._latencies = deque(maxlen=window)
+        self._cost_ratios = {}  # Level index -> its p95 over the next cheaper level's, same load
+        self._pending_ratio = None  # (level index, p95) of the level just stepped down from
+        self._last_change = time.monotonic()
+
+        self._transitions = {"down": 0, "up": 0}
+        self._served = {level.name: 0 for level in self.levels}
+        self._history = deque(maxlen=50)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Create a policy from the ``degradation`` block of config.yaml.
+
+        A missing or disabled block yields a single full-quality level, so
+        callers can always go through ``track()``.
+
+        Args:
+            config: Full configuration dictionary
+
+        Returns:
+            DegradationPolicy instance
+        """
+        block = config.get("degradation", {})
+        if not block.get("enabled", False):
+            return cls(levels=DEFAULT_LEVELS[:1])
+
+        return cls(
+            levels=block.get("levels"),
+            window=block.get("window", 50),
+            min_samples=block.get("min_samples", 10),
+            step_down_p95=block.get("step_down_p95", 1.5),
+            step_up_p95=block.get("step_up_p95", 0.5),
+            step_down_in_flight=block.get("step_down_in_flight"),
+            cooldown=block.get("cooldown", 5.0)
+        )
+
+    @property
+    def current(self):
+        """The level new requests are served at."""
+        return self.levels[self._index]
+
+    @contextmanager
+    def track(self, batch_size=1):
+        """
+        Serve one request under the policy.
+
+        Args:
+            batch_size: Number of images served by the request; the latency
+                sample is recorded per image so batches do not skew p95
+
+        Yields:
+            DegradationLevel the request should be served at
+        """
+        with self._lock:
+            self._in_flight += 1
+            level = self.levels[self._index]
+            self._served[level.name] += 1
+            self._reevaluate()
+
+        start = time.perf_counter()
+        try:
+            yield level
+        finally:
+            elapsed = (time.perf_counter() - start) / batch_size
+            with self._lock:
+                self._in_flight -= 1
+                # Samples from a level we already left would skew the new level's p95
+                if level.index == self._index:
+                    self._latencies.append(elapsed)
+                self._reevaluate()
+
+    def _depth(self):
+        """In-flight requests plus anything queued upstream."""
+        depth = self._in_flight
+        if self.queue_depth_fn is not None:
+            depth += self.queue_depth_fn()
+        return depth
+
+    def _p95(self):
+        """p95 of recent latencies at the current level, or None if too few samples."""
+        if len(self._latencies) < self.min_samples:
+            return None
+        return float(np.percentile(self._latencies, 95))
+
+    def _reevaluate(self):
+        """Step the ladder if the load signals say so (caller holds the lock)."""
+        if time.monotonic() - self._last_change < self.cooldown:
+            return
+
+        depth = self._depth()
+        p95 = self._p95()
+
+        if self._pending_ratio is not None and p95 is not None:
+            # First full window after stepping down: both p95s were measured
+            # under the same load, so their ratio is the cost of the level above
+            above, above_p95 = self._pending_ratio
+            self._cost_ratios[above] = max(1.0, above_p95 / p95)
+            self._pending_ratio = None
+
+        too_deep = self.step_down_in_flight is not None and depth > self.step_down_in_flight
+
+        if self._index < len(self.levels) - 1:
+            if too_deep:
+                self._change(self._index + 1, f"queue depth {depth}")
+                return
+            if p95 is not None and p95 > self.step_down_p95:
+                self._change(self._index + 1, f"p95 {p95:.3f}s")
+                return
+
+        if self._index > 0 and p95 is not None:
+            above = self._index - 1
+            calm = self.step_down_in_flight is None or depth <= self.step_down_in_flight // 2
+            projected = p95 * self._cost_ratios.get(above, 1.0)
+            if calm and projected < self.step_up_p95:
+                self._change(above, f"projected p95 {projected:.3f}s")
+
+    def _change(self, index, reason):
+        """Move to another level and record the transition (caller holds the lock)."""
+        direction = "down" if index > self._index else "up"
+        old, new = self.levels[self._index], self.levels[index]
+
+        p95 = self._p95()
+        self._pending_ratio = (self._index, p95) if direction == "down" and p95 else None
+
+        self._index = index
+        self._latencies.clear()
+        self._last_change = time.monotonic()
+        self._transitions[direction] += 1
+        self._history.append({
+            "time": time.time(),
+            "from": old.name,
+            "to": new.name,
+            "reason": reason
+        })
+        print(f"⚠️ Degradation {direction}: {old.name} -> {new.name} ({reason})")
+
+    def metrics(self):
+        """
+        Snapshot of the policy state for the metrics endpoint.
+
+        Returns:
+            Dictionary with current level, load signals and transition history
+        """
+        with self._lock:
+            return {
+                "level": self._index,
+                "name": self.current.name,
+                "in_flight": self._in_flight,
+                "queue_depth": self._depth(),
+                "p95_latency": self._p95(),
+                "transitions": dict(self._transitions),
+                "served": dict(self._served),
+                "recent_changes": list(self._history)
+            }
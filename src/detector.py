@@ -6,7 +6,8 @@ YOLO Detection Utilities for Waste Segregation System
 import cv2
 import numpy as np
 from pathlib import Path
-from ultralytics import YOLO
+
+from src.registry import get_registry
 
 
 class WasteDetector:
@@ -23,10 +24,17 @@ class WasteDetector:
             confidence_threshold: Minimum confidence for detections
             iou_threshold: IoU threshold for NMS
         """
-        self.model = YOLO(str(model_path))
+        self.registry = get_registry()
+        self.model_path = model_path
+        self.registry.get(model_path)
         self.conf_threshold = confidence_threshold
         self.iou_threshold = iou_threshold
 
+    @property
+    def model(self):
+        """Current YOLO model (follows hot reloads)."""
+        return self.registry.get(self.model_path).model
+
     def detect(self, image):
         """
         Detect waste objects in an image.
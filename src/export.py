@@ -0,0 +1,230 @@
+"""
+In-Graph Preprocessing for the Waste Segregation System
+
+Wraps the classifier and autoencoder so they take raw uint8 RGB batches and
+do their own normalization, which makes the model file the single source of
+truth for preprocessing. The wrapped autoencoder also computes the
+per-image reconstruction error in the graph, so callers never build a float
+copy of the input.
+
+Usage:
+    python -m src.export --check --images path/to/images   # parity check only
+    python -m src.export --images path/to/images           # check, then export
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+import tensorflow as tf
+from tensorflow import keras
+
+from src.registry import MODELS_DIR, VARIANT_PATHS, file_hash
+from src.utils.helpers import load_config
+
+
+@keras.utils.register_keras_serializable(package="waste_segregation")
+class ReconstructionError(keras.layers.Layer):
+    """
+    Per-image mean squared error between an input batch and its reconstruction.
+    """
+
+    def call(self, inputs):
+        original, reconstructed = inputs
+        return tf.reduce_mean(tf.square(original - reconstructed), axis=[1, 2, 3])
+
+
+def takes_uint8(model):
+    """Whether a Keras model already takes uint8 input."""
+    return tf.as_dtype(model.inputs[0].dtype) == tf.uint8
+
+
+def ensure_uint8_input(model, preprocessing="efficientnet"):
+    """
+    Return a model that takes uint8 input, wrapping float32 models.
+
+    Already-exported models (uint8 input) are returned unchanged. A float
+    model whose output has the shape of its input is treated as the
+    autoencoder, anything else as the classifier.
+
+    Args:
+        model: Keras model
+        preprocessing: Classifier normalization, "efficientnet" or "unit"
+
+    Returns:
+        Keras model with uint8 input
+    """
+    if takes_uint8(model):
+        return model
+    if tuple(model.output_shape[1:]) == tuple(model.input_shape[1:]):
+        return wrap_autoencoder(model)
+    return wrap_classifier(model, preprocessing)
+
+
+def wrap_classifier(model, preprocessing="efficientnet"):
+    """
+    Classifier that takes uint8 RGB batches.
+
+    Args:
+        model: Float32 classifier
+        preprocessing: "efficientnet" (raw 0-255 pixels, the model rescales
+            internally) or "unit" (scale to 0-1, as for MobileNetV2)
+
+    Returns:
+        Keras model with uint8 input and the original class probabilities
+    """
+    if preprocessing == "unit":
+        scale = 1.0 / 255
+    elif preprocessing == "efficientnet":
+        scale = 1.0  # EfficientNet normalizes inside the model; only cast
+    else:
+        raise ValueError(f"Unknown classifier preprocessing: {preprocessing}")
+
+    # Rescaling casts its uint8 input to float32 before scaling
+    inputs = keras.Input(shape=model.input_shape[1:], dtype="uint8", name="image")
+    x = keras.layers.Rescaling(scale, name="rescale")(inputs)
+    outputs = model(x)
+    return keras.Model(inputs, outputs, name=f"{model.name}_uint8")
+
+
+def wrap_autoencoder(model):
+    """
+    Autoencoder scorer that takes uint8 RGB batches.
+
+    Args:
+        model: Float32 autoencoder trained on 0-1 inputs
+
+    Returns:
+        Keras model with uint8 input and per-image reconstruction MSE output
+    """
+    inputs = keras.Input(shape=model.input_shape[1:], dtype="uint8", name="image")
+    x = keras.layers.Rescaling(1.0 / 255, name="rescale")(inputs)
+    reconstructed = model(x)
+    error = ReconstructionError(name="reconstruction_error")([x, reconstructed])
+    return keras.Model(inputs, error, name=f"{model.name}_uint8")
+
+
+def check_parity(classifier, autoencoder, images, preprocessing="efficientnet", tolerance=1e-4):
+    """
+    Compare the wrapped models on uint8 input with the float models on the
+    host-side preprocessing they replace.
+
+    Args:
+        classifier: Float32 classifier
+        autoencoder: Float32 autoencoder
+        images: List of RGB uint8 images
+        preprocessing: Classifier normalization used so far
+        tolerance: Maximum absolute difference allowed
+
+    Returns:
+        Tuple of (passed, report dictionary)
+    """
+    import cv2
+
+    classifier_size = tuple(classifier.input_shape[1:3])
+    autoencoder_size = tuple(autoencoder.input_shape[1:3])
+    class_batch = np.stack([cv2.resize(img, classifier_size[::-1]) for img in images])
+    ae_batch = np.stack([cv2.resize(img, autoencoder_size[::-1]) for img in images])
+
+    # Host-side preprocessing previously used by app.py / src modules
+    legacy_class = class_batch.astype(np.float32)
+    if preprocessing == "unit":
+        legacy_class /= 255.0
+    legacy_ae = ae_batch.astype(np.float32) / 255.0
+
+    legacy_probs = classifier.predict(legacy_class, verbose=0)
+    legacy_recon = autoencoder.predict(legacy_ae, verbose=0)
+    legacy_errors = np.mean((legacy_ae - legacy_recon) ** 2, axis=(1, 2, 3))
+
+    probs = wrap_classifier(classifier, preprocessing).predict(class_batch, verbose=0)
+    errors = wrap_autoencoder(autoencoder).predict(ae_batch, verbose=0)
+
+    report = {
+        "images": len(images),
+        "classifier_max_abs_diff": float(np.max(np.abs(probs - legacy_probs))),
+        "classifier_argmax_agreement": float(np.mean(probs.argmax(1) == legacy_probs.argmax(1))),
+        "autoencoder_max_abs_diff": float(np.max(np.abs(errors - legacy_errors)))
+    }
+    passed = (report["classifier_max_abs_diff"] <= tolerance
+              and report["autoencoder_max_abs_diff"] <= tolerance)
+    return passed, report
+
+
+def export_models(preprocessing="efficientnet"):
+    """
+    Replace the float models with their uint8-input versions.
+
+    The float originals are kept as ``*.float32.keras``.
+
+    Args:
+        preprocessing: Classifier normalization to build in
+
+    Returns:
+        List of exported paths
+    """
+    exported = []
+    for path in (MODELS_DIR / "mobilenet" / "waste_classifier_final.keras",
+                 MODELS_DIR / "autoencoder" / "autoencoder_final.keras"):
+        model = keras.models.load_model(str(path))
+        if takes_uint8(model):
+            print(f"   {path.name} already takes uint8 input")
+            continue
+
+        wrapped = ensure_uint8_input(model, preprocessing)
+        backup = path.with_suffix(".float32.keras")
+        tmp = path.with_suffix(".tmp.keras")
+        wrapped.save(str(tmp))
+        os.replace(path, backup)
+        os.replace(tmp, path)
+        print(f"   ✅ Exported {path.name} ({file_hash(path)}), float model kept as {backup.name}")
+        exported.append(path)
+
+    if exported:
+        # Variants quantized from the float models take float input and (for
+        # the autoencoder) output reconstructions; they must be re-quantized
+        for variants in VARIANT_PATHS.values():
+            for relpath in variants.values():
+                variant = MODELS_DIR / relpath
+                if variant.exists():
+                    variant.unlink()
+                    print(f"   🗑️ Removed stale variant {relpath}; re-run python -m src.quantization")
+    return exported
+
+
+def main():
+    """Command-line entry point."""
+    from src.quantization import load_images
+
+    preprocessing = load_config().get("preprocessing", {}).get("classifier", "efficientnet")
+
+    parser = argparse.ArgumentParser(description="Build normalization into the models")
+    parser.add_argument("--images", required=True, help="Folder of images for the parity check")
+    parser.add_argument("--check", action="store_true", help="Only run the parity check")
+    parser.add_argument("--limit", type=int, default=64)
+    parser.add_argument("--tolerance", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    classifier = keras.models.load_model(str(MODELS_DIR / "mobilenet" / "waste_classifier_final.keras"))
+    autoencoder = keras.models.load_model(str(MODELS_DIR / "autoencoder" / "autoencoder_final.keras"))
+    if takes_uint8(classifier) or takes_uint8(autoencoder):
+        print("Models are already exported; run the check against the *.float32.keras backups")
+        return
+
+    images = load_images(args.images, limit=args.limit)
+    passed, report = check_parity(classifier, autoencoder, images, preprocessing, args.tolerance)
+    for key, value in report.items():
+        print(f"   {key}: {value}")
+
+    if not passed:
+        print("❌ Parity check failed, models not exported")
+        sys.exit(1)
+    print("✅ Parity check passed")
+
+    if not args.check:
+        export_models(preprocessing)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+"""
+HTTP Load Testing for the /analyze Endpoint
+
+Replays local or synthetic images against a running server, or starts the
+Flask app locally with stand-in models, and reports throughput, latency
+percentiles, error and 429 rates and server memory over time.
+
+Usage:
+    # Local app with stand-in models, 20 requests/s for 30s
+    python -m src.loadtest --mode open --rate 20 --duration 30
+
+    # Existing server, 8 concurrent clients
+    python -m src.loadtest --url http://localhost:5000 --mode closed --concurrency 8
+"""
+
+import argparse
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from src.utils.helpers import get_project_root
+
+
+class _NoDetections:
+    """YOLO result stand-in with no boxes."""
+
+    boxes = []
+    names = {0: "waste"}
+
+
+class StandInDetector:
+    """
+    YOLO stand-in that takes a fixed time per image and detects nothing.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def __call__(self, images, verbose=False, **kwargs):
+        images = images if isinstance(images, list) else [images]
+        time.sleep(self.latency * len(images))
+        return [_NoDetections() for _ in images]
+
+    def predict(self, source=None, verbose=False, **kwargs):
+        return self(source)
+
+
+class StandInClassifier:
+    """
+    Classifier stand-in: deterministic probabilities from the mean pixel value.
+    """
+
+    def __init__(self, latency, num_classes=4):
+        self.latency = latency
+        self.num_classes = num_classes
+
+    def predict(self, x, verbose=0):
+        time.sleep(self.latency * len(x))
+        means = np.asarray(x, dtype=np.float32).mean(axis=(1, 2, 3))
+        logits = np.stack([np.cos(means / 40.0 + k) for k in range(self.num_classes)], axis=1)
+        probs = np.exp(logits)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+
+class StandInAutoencoder:
+    """
+    Autoencoder stand-in: reconstruction error from the pixel variance.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def predict(self, x, verbose=0):
+        time.sleep(self.latency * len(x))
+        return np.asarray(x, dtype=np.float32).std(axis=(1, 2, 3)) / 255.0 / 5.0
+
+
+# Model files replaced by stand-ins in the local server
+MODEL_SUFFIXES = {".pt", ".keras", ".h5", ".tflite"}
+
+
+def standin_model(path, latency=0.02):
+    """
+    Stand-in for a model file.
+
+    Args:
+        path: Path of the model the stand-in replaces
+        latency: Seconds each stand-in takes per image
+
+    Returns:
+        Object with the interface of the real model
+    """
+    path = Path(path)
+    if path.suffix == ".pt":
+        return StandInDetector(latency)
+    if "autoencoder" in path.name:
+        return StandInAutoencoder(latency)
+    return StandInClassifier(latency)
+
+
+def load_corpus(images_dir=None, count=20, size=(480, 640)):
+    """
+    Images to replay, as (filename, bytes) pairs.
+
+    Args:
+        images_dir: Folder of images; synthetic JPEGs are generated if None
+        count: Number of synthetic images
+        size: Synthetic image size (height, width)
+
+    Returns:
+        List of (filename, bytes)
+    """
+    if images_dir is not None:
+        paths = sorted(
+            p for p in Path(images_dir).rglob("*")
+            if p.suffix.lower() in {".jpg", ".jpeg", ".png", ".webp"}
+        )
+        return [(p.name, p.read_bytes()) for p in paths]
+
+    import cv2
+
+    rng = np.random.default_rng(0)
+    corpus = []
+    for i in range(count):
+        image = rng.integers(0, 256, (*size, 3), dtype=np.uint8)
+        ok, encoded = cv2.imencode(".jpg", image)
+        corpus.append((f"synthetic_{i:03d}.jpg", encoded.tobytes()))
+    return corpus
+
+
+def _multipart(filename, data):
+    """Encode a single-file multipart/form-data body."""
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def send(url, filename, data, timeout=60.0):
+    """
+    POST one image to /analyze.
+
+    Args:
+        url: Server base URL
+        filename: Upload filename
+        data: Image bytes
+        timeout: Request timeout in seconds
+
+    Returns:
+        HTTP status code (0 for connection errors and timeouts)
+    """
+    body, content_type = _multipart(filename, data)
+    request = urllib.request.Request(
+        f"{url}/analyze", data=body, method="POST", headers={"Content-Type": content_type}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, OSError):
+        return 0
+
+
+def _rss_mb(pid):
+    """Resident memory of a process in MB, or None if unavailable."""
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / 1e6
+    except ImportError:
+        pass
+    except Exception:
+        return None
+
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1e3
+    except OSError:
+        return None
+    return None
+
+
+class RSSSampler:
+    """
+    Samples a process's resident memory in the background.
+    """
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            rss = _rss_mb(self.pid)
+            if rss is not None:
+                self.samples.append({"t": round(time.perf_counter() - start, 3), "rss_mb": rss})
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_open_loop(url, corpus, rate, duration, timeout):
+    """
+    Send requests at a fixed rate regardless of how fast the server answers.
+
+    Latency is measured from each request's scheduled send time, so a slow
+    server cannot hide queueing delay by slowing the generator down.
+
+    Returns:
+        List of (start offset, latency, status)
+    """
+    records = []
+    lock = threading.Lock()
+    total = int(rate * duration)
+    start = time.perf_counter()
+
+    def fire(i, scheduled):
+        filename, data = corpus[i % len(corpus)]
+        status = send(url, filename, data, timeout)
+        latency = time.perf_counter() - scheduled
+        with lock:
+            records.append((scheduled - start, latency, status))
+
+    with ThreadPoolExecutor(max_workers=min(512, max(8, int(rate * timeout)))) as pool:
+        for i in range(total):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, i, scheduled)
+
+    return records
+
+
+def run_closed_loop(url, corpus, concurrency, duration, timeout):
+    """
+    Keep a fixed number of requests in flight for the given duration.
+
+    Returns:
+        List of (start offset, latency, status)
+    """
+    records = []
+    lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + duration
+
+    def client(worker):
+        i = worker
+        while time.perf_counter() < deadline:
+            filename, data = corpus[i % len(corpus)]
+            sent = time.perf_counter()
+            status = send(url, filename, data, timeout)
+            with lock:
+                records.append((sent - start, time.perf_counter() - sent, status))
+            i += concurrency
+
+    threads = [threading.Thread(target=client, args=(w,)) for w in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return records
+
+
+def summarize(records, elapsed):
+    """
+    Throughput, latency percentiles and error rates of a run.
+
+    Args:
+        records: List of (start offset, latency, status)
+        elapsed: Wall-clock duration of the run in seconds
+
+    Returns:
+        Summary dictionary
+    """
+    if not records:
+        return {"requests": 0}
+
+    statuses = np.array([r[2] for r in records])
+    ok = statuses == 200
+    latencies = np.array([r[1] for r in records if r[2] == 200]) if ok.any() else np.array([0.0])
+
+    return {
+        "requests": len(records),
+        "throughput": float(ok.sum() / elapsed),
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "max_ms": float(latencies.max() * 1000),
+        "error_rate": float(np.mean(~ok & (statuses != 429))),
+        "rate_429": float(np.mean(statuses == 429)),
+        "status_counts": {str(s): int(c) for s, c in zip(*np.unique(statuses, return_counts=True))}
+    }
+
+
+def _free_port():
+    """A free local TCP port."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_standins(port, standin_latency_ms=20):
+    """
+    Run app.py on a local port with every model replaced by a stand-in.
+
+    The stand-ins are injected into the shared registry before the app is
+    imported, so no weights are loaded.
+
+    Args:
+        port: Port to listen on
+        standin_latency_ms: Per-image latency of each stand-in model
+    """
+    from src.registry import get_registry
+
+    latency = standin_latency_ms / 1000.0
+    get_registry().override_loader(lambda path: standin_model(path, latency), MODEL_SUFFIXES)
+
+    import app
+    app.app.run(host="127.0.0.1", port=port, threaded=True)
+
+
+def start_local_server(port, standin_latency_ms=20, startup_timeout=120.0):
+    """
+    Start app.py with stand-in models on a local port.
+
+    Args:
+        port: Port to listen on
+        standin_latency_ms: Per-image latency of each stand-in model
+        startup_timeout: Seconds to wait for the server to answer
+
+    Returns:
+        subprocess.Popen of the server
+    """
+    code = f"from src.loadtest import serve_standins; serve_standins({port}, {standin_latency_ms!r})"
+    proc = subprocess.Popen(
+        [sys.executable, "-c", code], cwd=str(get_project_root()),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("Local server exited during startup")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=1):
+                return proc
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+
+    proc.terminate()
+    raise RuntimeError("Local server did not start in time")
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Load test the /analyze endpoint")
+    parser.add_argument("--url", default=None, help="Target server (default: start app.py locally)")
+    parser.add_argument("--pid", type=int, default=None, help="Server PID to sample RSS for (with --url)")
+    parser.add_argument("--images", default=None, help="Folder of images to replay (default: synthetic)")
+    parser.add_argument("--mode", choices=["open", "closed"], default="closed")
+    parser.add_argument("--rate", type=float, default=10.0, help="Requests/s in open-loop mode")
+    parser.add_argument("--concurrency", type=int, default=4, help="Clients in closed-loop mode")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--standin-latency-ms", type=float, default=20.0,
+                        help="Per-image latency of each stand-in model (local server only)")
+    parser.add_argument("--output", default=None, help="Results JSON path")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.images)
+    if not corpus:
+        print("❌ No images to replay")
+        sys.exit(1)
+
+    server = None
+    url, pid = args.url, args.pid
+    if url is None:
+        port = _free_port()
+        print(f"🔄 Starting local server with stand-in models on port {port}...")
+        server = start_local_server(port, args.standin_latency_ms)
+        url, pid = f"http://127.0.0.1:{port}", server.pid
+    url = url.rstrip("/")
+
+    sampler = RSSSampler(pid) if pid is not None else None
+    if sampler:
+        sampler.start()
+
+    load = f"{args.rate:g} req/s" if args.mode == "open" else f"{args.concurrency} clients"
+    print(f"🚀 {args.mode}-loop load ({load}) against {url} for {args.duration:g}s...")
+    try:
+        start = time.perf_counter()
+        if args.mode == "open":
+            records = run_open_loop(url, corpus, args.rate, args.duration, args.timeout)
+        else:
+            records = run_closed_loop(url, corpus, args.concurrency, args.duration, args.timeout)
+        elapsed = time.perf_counter() - start
+    finally:
+        if sampler:
+            sampler.stop()
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    summary = summarize(records, elapsed)
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "target": args.url or "local (stand-in models)",
+        "mode": args.mode,
+        "rate": args.rate if args.mode == "open" else None,
+        "concurrency": args.concurrency if args.mode == "closed" else None,
+        "duration": args.duration,
+        "corpus_images": len(corpus),
+        "summary": summary,
+        "rss_mb": sampler.samples if sampler else [],
+        "requests": [{"t": round(t, 4), "latency_ms": round(l * 1000, 2), "status": s}
+                     for t, l, s in records]
+    }
+
+    output = args.output
+    if output is None:
+        metrics_dir = get_project_root() / "outputs" / "metrics"
+        metrics_dir.mkdir(parents=True, exist_ok=True)
+        output = metrics_dir / f"loadtest_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"\n📊 Results ({summary['requests']} requests):")
+    if summary["requests"]:
+        print(f"   Throughput: {summary['throughput']:.2f} req/s")
+        print(f"   Latency p50/p95/p99/max: {summary['p50_ms']:.0f}/{summary['p95_ms']:.0f}/"
+              f"{summary['p99_ms']:.0f}/{summary['max_ms']:.0f} ms")
+        print(f"   Errors: {summary['error_rate']:.1%}, 429s: {summary['rate_429']:.1%}")
+    if results["rss_mb"]:
+        print(f"   Server RSS: peak {max(s['rss_mb'] for s in results['rss_mb']):.0f} MB")
+    print(f"   Saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,14 @@ Unified interface for waste detection, classification, and anomaly detection.
 
 import numpy as np
 from pathlib import Path
-import yaml
 import cv2
 from datetime import datetime
 
-import tensorflow as tf
-from tensorflow import keras
-from ultralytics import YOLO
+from src.degradation import DegradationPolicy
+from src.registry import get_registry
+from src.resources import configure_threads
+from src.results_log import get_results_log
+from src.utils.helpers import load_config
 
 
 class WasteSegregationPipeline:
@@ -23,39 +24,56 @@ class WasteSegregationPipeline:
     - Autoencoder for anomaly detection
     """
 
-    def __init__(self, models_dir=None):
+    def __init__(self, models_dir=None, degradation=None, results_log=None):
         """
         Initialize pipeline with models from specified directory.
 
         Args:
             models_dir: Path to models directory. If None, uses default.
+            degradation: Optional DegradationPolicy; defaults to the
+                ``degradation`` block of config.yaml.
+            results_log: Optional ResultsLog; defaults to the one enabled
+                in config.yaml (if any).
         """
         if models_dir is None:
             models_dir = Path(__file__).parent.parent / "models"
         else:
             models_dir = Path(models_dir)
 
-        # Load models
-        self.detector = YOLO(str(models_dir / "yolo" / "waste_detector_best.pt"))
-        self.classifier = keras.models.load_model(
-            str(models_dir / "mobilenet" / "waste_classifier_final.keras")
-        )
-        self.autoencoder = keras.models.load_model(
-            str(models_dir / "autoencoder" / "autoencoder_final.keras")
-        )
+        # Apply the CPU thread budget before the runtimes start their pools
+        config = load_config()
+        configure_threads(config.get("resources"))
 
-        # Load configs
-        with open(models_dir / "mobilenet" / "class_mapping.yaml", "r") as f:
-            self.class_names = yaml.safe_load(f)["classes"]
+        # Models and configs come from the shared registry, so they are loaded
+        # once per process and pick up hot reloads
+        self.registry = get_registry()
+        self.detector_path = models_dir / "yolo" / "waste_detector_best.pt"
+        self.classifier_path = self.registry.path_for("classifier", models_dir)
+        self.autoencoder_path = self.registry.path_for("autoencoder", models_dir)
+        self.class_mapping_path = models_dir / "mobilenet" / "class_mapping.yaml"
+        self.anomaly_config_path = models_dir / "autoencoder" / "anomaly_config.yaml"
 
-        with open(models_dir / "autoencoder" / "anomaly_config.yaml", "r") as f:
-            config = yaml.safe_load(f)
-            self.anomaly_threshold = config["threshold"]
+        for path in (self.detector_path, self.classifier_path, self.autoencoder_path,
+                     self.class_mapping_path, self.anomaly_config_path):
+            self.registry.get(path)
 
         # Image sizes
         self.classifier_size = (224, 224)
         self.autoencoder_size = (128, 128)
 
+        # Load-aware degradation and the lighter classifiers it may switch to
+        self.degradation = degradation or DegradationPolicy.from_config(config)
+        self.lite_classifier_paths = {}
+        for level in self.degradation.levels:
+            if level.classifier_model is None:
+                continue
+            lite_path = models_dir.parent / level.classifier_model
+            if self.registry.get_optional(lite_path) is not None:
+                self.lite_classifier_paths[level.index] = lite_path
+
+        # Every result is appended to the results log when one is enabled
+        self.results_log = results_log or get_results_log()
+
         # Disposal info
         self.disposal_info = {
             "recyclable": {
@@ -76,6 +94,34 @@ class WasteSegregationPipeline:
             }
         }
 
+    @property
+    def detector(self):
+        """Current YOLO detector."""
+        return self.registry.get(self.detector_path).model
+
+    @property
+    def classifier(self):
+        """Current classifier model."""
+        return self.registry.get(self.classifier_path).model
+
+    @property
+    def autoencoder(self):
+        """Current autoencoder model."""
+        return self.registry.get(self.autoencoder_path).model
+
+    @property
+    def class_names(self):
+        """Class names indexed by classifier output."""
+        mapping = self.registry.get(self.class_mapping_path).config
+        if "classes" in mapping:
+            return mapping["classes"]
+        return [mapping[i] for i in sorted(mapping)]
+
+    @property
+    def anomaly_threshold(self):
+        """Current anomaly threshold."""
+        return self.registry.get(self.anomaly_config_path).config["threshold"]
+
     def analyze(self, image_path):
         """
         Analyze a waste image.
@@ -86,6 +132,16 @@ class WasteSegregationPipeline:
         Returns:
             Dictionary with classification, anomaly detection, and disposal info
         """
+        with self.degradation.track() as level:
+            result = self._analyze(image_path, level)
+
+        result["degradation"] = level.to_dict()
+        if self.results_log is not None:
+            self.results_log.record(result)
+        return result
+
+    def _analyze(self, image_path, level):
+        """Run the models enabled at the given degradation level."""
         # Load image
         if isinstance(image_path, (str, Path)):
             image = cv2.imread(str(image_path))
@@ -93,24 +149,35 @@ class WasteSegregationPipeline:
         else:
             image = image_path
 
-        # Classification
-        img_class = cv2.resize(image, self.classifier_size)
-        img_class = img_class.astype(np.float32) / 255.0
+        # Classification (a lighter model may stand in at degraded levels)
+        if level.index in self.lite_classifier_paths:
+            classifier = self.registry.get(self.lite_classifier_paths[level.index]).model
+            classifier_size = (level.classifier_size, level.classifier_size)
+        else:
+            classifier = self.classifier
+            classifier_size = self.classifier_size
+
+        # Models take raw uint8 pixels and normalize internally
+        img_class = cv2.resize(image, classifier_size)
         img_class = np.expand_dims(img_class, axis=0)
 
-        preds = self.classifier.predict(img_class, verbose=0)[0]
+        preds = classifier.predict(img_class, verbose=0)[0]
         class_idx = int(np.argmax(preds))
         class_name = self.class_names[class_idx]
         confidence = float(preds[class_idx])
 
-        # Anomaly detection
-        img_ae = cv2.resize(image, self.autoencoder_size)
-        img_ae = img_ae.astype(np.float32) / 255.0
-        img_ae = np.expand_dims(img_ae, axis=0)
+        # Anomaly detection (skipped at degraded levels)
+        if level.anomaly:
+            img_ae = cv2.resize(image, self.autoencoder_size)
+            img_ae = np.expand_dims(img_ae, axis=0)
 
-        recon = self.autoencoder.predict(img_ae, verbose=0)
-        error = float(np.mean((img_ae - recon) ** 2))
-        is_anomaly = error > self.anomaly_threshold
+            error = float(self.autoencoder.predict(img_ae, verbose=0)[0])
+            threshold = self.anomaly_threshold
+            is_anomaly = error > threshold
+            anomaly_score = error / threshold
+        else:
+            is_anomaly = False
+            anomaly_score = None
 
         # Get disposal recommendation
         if is_anomaly:
@@ -125,7 +192,7 @@ class WasteSegregationPipeline:
             "waste_type": class_name,
             "confidence": confidence,
             "is_anomaly": is_anomaly,
-            "anomaly_score": error / self.anomaly_threshold,
+            "anomaly_score": anomaly_score,
             "disposal": disposal,
             "timestamp": datetime.now().isoformat()
         }
@@ -145,7 +212,7 @@ def main():
     import sys
 
     if len(sys.argv) < 2:
-        print("Usage: python pipeline.py <image_path>")
+        print("Usage: python -m src.pipeline <image_path>")
         return
 
     image_path = sys.argv[1]
@@ -156,8 +223,7 @@ def main():
     # Analyze image
     result = pipeline.analyze(image_path)
 
-    print("
-Waste Analysis Result:")
+    print("\nWaste Analysis Result:")
     print(f"  Type: {result['waste_type'].upper()}")
     print(f"  Confidence: {result['confidence']:.1%}")
     print(f"  Anomaly: {'Yes' if result['is_anomaly'] else 'No'}")
@@ -0,0 +1,440 @@
+"""
+Post-Training Quantization for the Waste Segregation System
+
+Converts the float32 classifier and autoencoder to int8 (and optionally
+float16) TFLite variants, calibrated on a folder of representative images.
+A variant is only published next to the original model if it agrees with
+the float model (as an unoptimized float32 TFLite conversion, which is also
+the speed and memory baseline) on class predictions and on anomaly decisions.
+
+Usage:
+    python -m src.quantization --calibration-dir path/to/images
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import yaml
+
+import tensorflow as tf
+
+from src.registry import MODELS_DIR, VARIANT_PATHS, get_registry
+from src.utils.helpers import load_config
+
+
+class TFLiteModel:
+    """
+    TFLite interpreter with the ``predict()`` interface of a Keras model, so
+    quantized variants can be used anywhere the float model is.
+    """
+
+    def __init__(self, model_path, num_threads=None):
+        """
+        Initialize the interpreter.
+
+        Args:
+            model_path: Path to the .tflite file
+            num_threads: Interpreter threads (defaults to TF_NUM_INTRAOP_THREADS)
+        """
+        if num_threads is None and "TF_NUM_INTRAOP_THREADS" in os.environ:
+            num_threads = int(os.environ["TF_NUM_INTRAOP_THREADS"])
+
+        self.interpreter = tf.lite.Interpreter(model_path=str(model_path), num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self._input["shape"][0])
+
+        # An interpreter holds one set of tensors and is not thread-safe
+        self._lock = threading.Lock()
+
+    @property
+    def input_shape(self):
+        """Input shape, like ``keras.Model.input_shape``."""
+        return tuple(int(dim) for dim in self._input["shape"])
+
+    @property
+    def output_shape(self):
+        """Output shape, like ``keras.Model.output_shape``."""
+        return tuple(int(dim) for dim in self._output["shape"])
+
+    def predict(self, x, verbose=0):
+        """
+        Run inference on a batch.
+
+        Args:
+            x: Input batch (same layout and dtype as the Keras model)
+            verbose: Ignored; accepted for Keras compatibility
+
+        Returns:
+            Output batch as float32
+        """
+        x = np.asarray(x)
+
+        with self._lock:
+            if x.shape[0] != self._batch_size:
+                self.interpreter.resize_tensor_input(self._input["index"], list(x.shape))
+                self.interpreter.allocate_tensors()
+                self._input = self.interpreter.get_input_details()[0]
+                self._output = self.interpreter.get_output_details()[0]
+                self._batch_size = x.shape[0]
+
+            self.interpreter.set_tensor(self._input["index"], self._quantize(x))
+            self.interpreter.invoke()
+            y = self.interpreter.get_tensor(self._output["index"])
+
+        return self._dequantize(y)
+
+    def _quantize(self, x):
+        """Convert an input batch to the interpreter's input type."""
+        dtype = self._input["dtype"]
+        scale, zero_point = self._input["quantization"]
+        if np.issubdtype(dtype, np.integer) and scale:
+            x = np.round(x / scale + zero_point)
+            info = np.iinfo(dtype)
+            x = np.clip(x, info.min, info.max)
+        return x.astype(dtype)
+
+    def _dequantize(self, y):
+        """Convert an interpreter output back to float32."""
+        scale, zero_point = self._output["quantization"]
+        if np.issubdtype(y.dtype, np.integer) and scale:
+            return (y.astype(np.float32) - zero_point) * scale
+        return y.astype(np.float32)
+
+
+def image_paths(images_dir):
+    """Image files in a folder (recursively), sorted."""
+    return sorted(
+        p for p in Path(images_dir).rglob("*")
+        if p.suffix.lower() in {".jpg", ".jpeg", ".png", ".webp"}
+    )
+
+
+def load_images(images_dir, limit=None, paths=None):
+    """
+    Load images from a folder (recursively) as RGB uint8 arrays.
+
+    Args:
+        images_dir: Folder with images
+        limit: Maximum number of images to load
+        paths: Explicit image files to load instead of the folder's contents
+
+    Returns:
+        List of RGB images
+    """
+    if paths is None:
+        paths = image_paths(images_dir)
+    if limit is not None:
+        # Spread the sample over the whole folder (and therefore all classes)
+        step = max(1, len(paths) // limit)
+        paths = paths[::step][:limit]
+
+    images = []
+    for path in paths:
+        img = cv2.imread(str(path))
+        if img is not None:
+            images.append(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+    return images
+
+
+def resize_batch(images, size):
+    """
+    Model inputs: resized uint8 images (normalization is built into the models).
+
+    Args:
+        images: List of RGB uint8 images
+        size: Model input size
+
+    Returns:
+        uint8 batch
+    """
+    return np.stack([cv2.resize(img, size, interpolation=cv2.INTER_LANCZOS4) for img in images])
+
+
+def _rss_bytes():
+    """Resident memory of this process in bytes, or None if unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def convert(model, calibration_batch, mode):
+    """
+    Convert a Keras model to TFLite.
+
+    Args:
+        model: Keras model (uint8 input, see src.export)
+        calibration_batch: Representative inputs for int8 calibration
+        mode: "int8", "float16", or "float32" for the unoptimized baseline
+
+    Returns:
+        Serialized TFLite model (bytes)
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if mode == "float32":
+        return converter.convert()
+
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if mode == "int8":
+        def representative_dataset():
+            for sample in calibration_batch:
+                yield [sample[None]]
+
+        converter.representative_dataset = representative_dataset
+        # Ops without an int8 kernel fall back to float instead of failing
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
+            tf.lite.OpsSet.TFLITE_BUILTINS
+        ]
+    elif mode == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    else:
+        raise ValueError(f"Unknown quantization mode: {mode}")
+
+    return converter.convert()
+
+
+def _run(model, batch, batch_size=16):
+    """Predict a large batch in chunks, timing per-image latency."""
+    outputs = []
+    start = time.perf_counter()
+    for i in range(0, len(batch), batch_size):
+        outputs.append(model.predict(batch[i:i + batch_size], verbose=0))
+    elapsed = time.perf_counter() - start
+    return np.concatenate(outputs), elapsed / len(batch)
+
+
+def measure(model_path, batch):
+    """
+    Load a TFLite model and run it over a batch.
+
+    Args:
+        model_path: Path to the .tflite file
+        batch: Evaluation inputs
+
+    Returns:
+        Tuple of (model, outputs, per-image latency in seconds, resident
+        memory in MB the interpreter added including its arenas, or None)
+    """
+    rss_before = _rss_bytes()
+    model = TFLiteModel(model_path)
+    outputs, latency = _run(model, batch)
+    rss_after = _rss_bytes()
+
+    rss_mb = None
+    if rss_before is not None and rss_after is not None:
+        rss_mb = (rss_after - rss_before) / 1e6
+    return model, outputs, latency, rss_mb
+
+
+def evaluate_classifier(float_preds, quant_preds):
+    """
+    Compare quantized classifier outputs with the float model's.
+
+    Args:
+        float_preds: Class probabilities of the float model
+        quant_preds: Class probabilities of the quantized model
+
+    Returns:
+        Dictionary with class agreement
+    """
+    return {
+        "class_agreement": float(np.mean(float_preds.argmax(axis=1) == quant_preds.argmax(axis=1)))
+    }
+
+
+def evaluate_autoencoder(float_errors, quant_errors, threshold):
+    """
+    Compare quantized autoencoder outputs with the float model's.
+
+    Both models output the per-image reconstruction error (see src.export).
+
+    Args:
+        float_errors: Reconstruction errors of the float model
+        quant_errors: Reconstruction errors of the quantized model
+        threshold: Anomaly threshold on reconstruction MSE
+
+    Returns:
+        Dictionary with anomaly-decision agreement
+    """
+    return {
+        "anomaly_agreement": float(np.mean((float_errors > threshold) == (quant_errors > threshold))),
+        "mean_error_shift": float(np.mean(np.abs(float_errors - quant_errors)))
+    }
+
+
+def quantize_models(calibration_dir, eval_dir=None, modes=("int8",), min_class_agreement=0.98,
+                    min_anomaly_agreement=0.98, calibration_samples=200, publish=True):
+    """
+    Quantize the classifier and autoencoder and publish variants that pass the gate.
+
+    Args:
+        calibration_dir: Folder of representative images for int8 calibration
+        eval_dir: Folder of images for the accuracy gate; without one, every
+            fifth calibration image is held out for the gate instead
+        modes: Quantization modes to produce ("int8", "float16")
+        min_class_agreement: Minimum top-1 agreement with the float classifier
+        min_anomaly_agreement: Minimum anomaly-decision agreement with the float autoencoder
+        calibration_samples: Maximum calibration images
+        publish: Write passing variants next to the float models
+
+    Returns:
+        Report dictionary
+    """
+    registry = get_registry()
+    classifier = registry.get(MODELS_DIR / "mobilenet" / "waste_classifier_final.keras")
+    autoencoder = registry.get(MODELS_DIR / "autoencoder" / "autoencoder_final.keras")
+    threshold = registry.get("anomaly_config").config["threshold"]
+
+    if eval_dir:
+        calibration_images = load_images(calibration_dir, limit=calibration_samples)
+        eval_images = load_images(eval_dir)
+        eval_source = str(eval_dir)
+    else:
+        # Gating on the calibration images themselves would inflate agreement
+        print("⚠️ No --eval-dir given; holding out every fifth calibration image for the accuracy gate")
+        paths = image_paths(calibration_dir)
+        held_out = set(paths[4::5])
+        calibration_images = load_images(
+            calibration_dir, limit=calibration_samples, paths=[p for p in paths if p not in held_out]
+        )
+        eval_images = load_images(calibration_dir, paths=sorted(held_out))
+        eval_source = f"held out from {calibration_dir}"
+    if not calibration_images or not eval_images:
+        raise ValueError("No images found for calibration/evaluation")
+
+    classifier_size = tuple(classifier.model.input_shape[1:3])[::-1]
+    autoencoder_size = tuple(autoencoder.model.input_shape[1:3])[::-1]
+    inputs = {
+        "classifier": (
+            resize_batch(calibration_images, classifier_size),
+            resize_batch(eval_images, classifier_size)
+        ),
+        "autoencoder": (
+            resize_batch(calibration_images, autoencoder_size),
+            resize_batch(eval_images, autoencoder_size)
+        )
+    }
+
+    report = {
+        "calibration_images": len(calibration_images),
+        "eval_images": len(eval_images),
+        "eval_source": eval_source,
+        "threshold": threshold,
+        "variants": {}
+    }
+
+    for name, handle in (("classifier", classifier), ("autoencoder", autoencoder)):
+        calibration_batch, eval_batch = inputs[name]
+
+        # Baseline: the same wrapped model converted to TFLite without
+        # optimizations, so speedup and memory compare like with like. It
+        # stays loaded while the variants run so they cannot reuse its pages.
+        print(f"🔄 Converting {name} (float32 baseline)...")
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline_path = Path(tmp) / f"{name}_float32.tflite"
+            baseline_path.write_bytes(convert(handle.model, calibration_batch, "float32"))
+            baseline, float_outputs, float_latency, float_rss_mb = measure(baseline_path, eval_batch)
+
+        for mode in modes:
+            print(f"🔄 Quantizing {name} ({mode})...")
+            tflite_bytes = convert(handle.model, calibration_batch, mode)
+
+            target = MODELS_DIR / VARIANT_PATHS[name][mode]
+            candidate = target.with_suffix(".candidate.tflite")
+            candidate.write_bytes(tflite_bytes)
+            quantized, quant_outputs, quant_latency, quant_rss_mb = measure(candidate, eval_batch)
+            del quantized
+
+            if name == "classifier":
+                metrics = evaluate_classifier(float_outputs, quant_outputs)
+                passed = metrics["class_agreement"] >= min_class_agreement
+            else:
+                metrics = evaluate_autoencoder(float_outputs, quant_outputs, threshold)
+                passed = metrics["anomaly_agreement"] >= min_anomaly_agreement
+
+            float_size = handle.path.stat().st_size
+            metrics.update({
+                "passed": bool(passed),
+                "float_latency_ms": float_latency * 1000,
+                "quantized_latency_ms": quant_latency * 1000,
+                "speedup": float_latency / quant_latency,
+                "float_size_mb": float_size / 1e6,
+                "quantized_size_mb": len(tflite_bytes) / 1e6,
+                "size_reduction": 1 - len(tflite_bytes) / float_size
+            })
+            if float_rss_mb is not None and quant_rss_mb is not None:
+                metrics.update({
+                    "float_rss_mb": float_rss_mb,
+                    "quantized_rss_mb": quant_rss_mb,
+                    "memory_saving_mb": float_rss_mb - quant_rss_mb
+                })
+
+            if passed and publish:
+                os.replace(candidate, target)
+                metrics["published"] = str(target.relative_to(MODELS_DIR))
+            else:
+                candidate.unlink()
+
+            status = "✅ Passed" if passed else "❌ Failed gate"
+            memory = ""
+            if "quantized_rss_mb" in metrics:
+                memory = (f", {metrics['quantized_rss_mb']:.0f} MB resident "
+                          f"vs {metrics['float_rss_mb']:.0f} MB float")
+            print(f"   {status}: {metrics['speedup']:.2f}x faster than float32 TFLite, "
+                  f"{metrics['size_reduction']:.0%} smaller file{memory}")
+            report["variants"][f"{name}_{mode}"] = metrics
+
+        del baseline
+
+    if publish:
+        with open(MODELS_DIR / "quantization_report.yaml", "w") as f:
+            yaml.safe_dump(report, f, sort_keys=False)
+
+    return report
+
+
+def main():
+    """Command-line entry point."""
+    config = load_config().get("quantization", {})
+
+    parser = argparse.ArgumentParser(description="Quantize the classifier and autoencoder")
+    parser.add_argument("--calibration-dir", required=True, help="Folder of representative images")
+    parser.add_argument("--eval-dir", default=None,
+                        help="Folder of images for the accuracy gate (default: hold out 1/5 of calibration images)")
+    parser.add_argument("--modes", nargs="+", default=["int8"], choices=["int8", "float16"])
+    parser.add_argument("--min-class-agreement", type=float,
+                        default=config.get("min_class_agreement", 0.98))
+    parser.add_argument("--min-anomaly-agreement", type=float,
+                        default=config.get("min_anomaly_agreement", 0.98))
+    parser.add_argument("--calibration-samples", type=int,
+                        default=config.get("calibration_samples", 200))
+    parser.add_argument("--dry-run", action="store_true", help="Evaluate without publishing")
+    args = parser.parse_args()
+
+    quantize_models(
+        calibration_dir=args.calibration_dir,
+        eval_dir=args.eval_dir,
+        modes=args.modes,
+        min_class_agreement=args.min_class_agreement,
+        min_anomaly_agreement=args.min_anomaly_agreement,
+        calibration_samples=args.calibration_samples,
+        publish=not args.dry_run
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+"""
+Shared Model Registry for the Waste Segregation System
+
+Loads each model and config file once per process, hands out shared handles
+and hot-swaps them in the background when the files on disk change.
+"""
+
+import gc
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+from src.utils.helpers import load_config
+
+
+MODELS_DIR = Path(__file__).parent.parent / "models"
+
+# Well-known names, relative to the models directory
+DEFAULT_PATHS = {
+    "detector": "yolo/waste_detector_best.pt",
+    "classifier": "mobilenet/waste_classifier_final.keras",
+    "autoencoder": "autoencoder/autoencoder_final.keras",
+    "class_mapping": "mobilenet/class_mapping.yaml",
+    "anomaly_config": "autoencoder/anomaly_config.yaml"
+}
+
+# Quantized variants published by src.quantization
+VARIANT_PATHS = {
+    "classifier": {
+        "int8": "mobilenet/waste_classifier_int8.tflite",
+        "float16": "mobilenet/waste_classifier_float16.tflite"
+    },
+    "autoencoder": {
+        "int8": "autoencoder/autoencoder_int8.tflite",
+        "float16": "autoencoder/autoencoder_float16.tflite"
+    }
+}
+
+AUTOENCODER_VARIANTS = {Path(p).name for p in VARIANT_PATHS["autoencoder"].values()}
+
+
+def _load_yolo(path):
+    from ultralytics import YOLO
+    return YOLO(str(path))
+
+
+def _load_keras(path):
+    from tensorflow import keras
+    # Importing src.export registers its layers; float models are wrapped so
+    # every caller can pass raw uint8 images
+    from src.export import ensure_uint8_input
+    model = keras.models.load_model(str(path))
+    preprocessing = load_config().get("preprocessing", {}).get("classifier", "efficientnet")
+    return ensure_uint8_input(model, preprocessing)
+
+
+def _load_tflite(path):
+    from src.quantization import TFLiteModel
+    model = TFLiteModel(path)
+    # Autoencoder variants must output per-image errors (see src.export);
+    # ones quantized before that change still output reconstructions
+    if path.name in AUTOENCODER_VARIANTS and len(model.output_shape) != 1:
+        raise ValueError(f"{path.name} outputs reconstructions, not per-image errors; "
+                         f"re-run python -m src.quantization")
+    return model
+
+
+def _load_yaml(path):
+    with open(path, "r") as f:
+        return yaml.safe_load(f)
+
+
+LOADERS = {
+    ".pt": _load_yolo,
+    ".keras": _load_keras,
+    ".h5": _load_keras,
+    ".tflite": _load_tflite,
+    ".yaml": _load_yaml,
+    ".yml": _load_yaml
+}
+
+
+def warm_up(model):
+    """
+    Run one dummy input through a freshly loaded model, so graph tracing and
+    allocation happen before it serves a request rather than inside one.
+
+    Args:
+        model: Loaded object (Keras/TFLite model, YOLO model or config dict)
+    """
+    try:
+        if hasattr(model, "input_shape"):
+            # Keras and TFLite models take uint8 image batches
+            shape = [1] + [dim or 1 for dim in model.input_shape[1:]]
+            model.predict(np.zeros(shape, dtype=np.uint8), verbose=0)
+        elif callable(model):
+            model(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False)
+    except Exception as e:
+        print(f"⚠️ Warm-up failed: {e}")
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """
+    Compute the SHA-256 of a file.
+
+    Args:
+        path: Path to the file
+        chunk_size: Read size in bytes
+
+    Returns:
+        Hex digest (first 16 characters)
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+class ModelHandle:
+    """
+    Immutable snapshot of a loaded model or config file.
+
+    Callers should fetch a handle once per request and use it throughout, so
+    a hot reload in the middle of a request never mixes two versions.
+    """
+
+    def __init__(self, path, model, version, stat):
+        """
+        Args:
+            path: Resolved path of the file
+            model: Loaded object (Keras model, YOLO model or config dict)
+            version: Content hash of the file
+            stat: (mtime_ns, size) of the file when it was loaded
+        """
+        self.path = path
+        self.model = model
+        self.version = version
+        self.stat = stat
+        self.loaded_at = time.time()
+
+    @property
+    def config(self):
+        """Alias of ``model`` for config files."""
+        return self.model
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of models and configs keyed by resolved file path.
+    """
+
+    def __init__(self, models_dir=None, variants=None):
+        """
+        Initialize the registry.
+
+        Args:
+            models_dir: Directory that well-known names resolve against
+            variants: Optional mapping of model name to quantized variant
+                ("int8", "float16"); "float32" or missing uses the original model
+        """
+        self.models_dir = Path(models_dir) if models_dir else MODELS_DIR
+        self.variants = variants or {}
+
+        self._names = {}
+        self._overrides = {}  # Suffix -> loader that replaces the file on disk
+        self._handles = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._pending = {}  # Path -> stat seen on the previous poll
+
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def resolve(self, name_or_path):
+        """
+        Resolve a well-known name or a path to an absolute path.
+
+        Args:
+            name_or_path: Name from DEFAULT_PATHS or a file path
+
+        Returns:
+            Absolute Path
+        """
+        if name_or_path in DEFAULT_PATHS:
+            # Names are resolved once, so the variant choice is fixed per process
+            if name_or_path not in self._names:
+                self._names[name_or_path] = self.path_for(name_or_path)
+            return self._names[name_or_path]
+        return Path(name_or_path).resolve()
+
+    def path_for(self, name, models_dir=None):
+        """
+        Path of a well-known model, honouring the configured variant.
+
+        Falls back to the float32 model if the variant has not been published.
+
+        Args:
+            name: Name from DEFAULT_PATHS
+            models_dir: Models directory (defaults to the registry's)
+
+        Returns:
+            Absolute Path
+        """
+        models_dir = Path(models_dir) if models_dir else self.models_dir
+
+        variant = self.variants.get(name, "float32")
+        if variant != "float32":
+            variant_path = models_dir / VARIANT_PATHS[name][variant]
+            if variant_path.exists():
+                return variant_path.resolve()
+            print(f"⚠️ {variant} {name} not published, using float32 model")
+
+        return (models_dir / DEFAULT_PATHS[name]).resolve()
+
+    def get(self, name_or_path):
+        """
+        Get the handle for a model or config, loading it on first use.
+
+        Args:
+            name_or_path: Name from DEFAULT_PATHS or a file path
+
+        Returns:
+            ModelHandle
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        path = self.resolve(name_or_path)
+
+        handle = self._handles.get(path)
+        if handle is not None:
+            return handle
+
+        # One lock per file so concurrent first requests load it only once
+        with self._lock:
+            load_lock = self._load_locks.setdefault(path, threading.Lock())
+
+        with load_lock:
+            handle = self._handles.get(path)
+            if handle is None:
+                handle = self._load(path)
+                with self._lock:
+                    self._handles[path] = handle
+        return handle
+
+    def get_optional(self, name_or_path):
+        """
+        Like ``get()``, but returns None if the file does not exist.
+
+        Args:
+            name_or_path: Name from DEFAULT_PATHS or a file path
+
+        Returns:
+            ModelHandle or None
+        """
+        path = self.resolve(name_or_path)
+        if path not in self._handles and not path.exists() and path.suffix.lower() not in self._overrides:
+            return None
+        return self.get(path)
+
+    def versions(self):
+        """
+        Versions of everything loaded so far.
+
+        Returns:
+            Dictionary mapping file path to content hash
+        """
+        with self._lock:
+            return {str(path): handle.version for path, handle in self._handles.items()}
+
+    def override_loader(self, loader, suffixes):
+        """
+        Serve files with the given suffixes from ``loader(path)`` instead of
+        loading them, whether or not they exist on disk. Must be called
+        before those files are first loaded.
+
+        Args:
+            loader: Callable taking a path and returning the object to serve
+            suffixes: File suffixes (e.g. ".keras") to override
+        """
+        for suffix in suffixes:
+            self._overrides[suffix.lower()] = loader
+
+    def _load(self, path):
+        """Load a file into a new handle."""
+        override = self._overrides.get(path.suffix.lower())
+        if override is not None:
+            return ModelHandle(path, override(path), "override", self._stat(path))
+
+        if not path.exists():
+            raise FileNotFoundError(f"Model file not found: {path}")
+
+        loader = LOADERS.get(path.suffix.lower())
+        if loader is None:
+            raise ValueError(f"No loader for file type: {path.suffix}")
+
+        stat = self._stat(path)
+        version = file_hash(path)
+        model = loader(path)
+        warm_up(model)
+        return ModelHandle(path, model, version, stat)
+
+    @staticmethod
+    def _stat(path):
+        """(mtime_ns, size) of a file, or None if it is gone."""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def check_for_updates(self):
+        """
+        Reload every file whose contents changed on disk.
+
+        A file is only reloaded once its size and mtime are unchanged across
+        two polls, so a copy in progress is never loaded half-written. Files
+        are reloaded one at a time, so at most one extra model is resident
+        during a swap.
+
+        Returns:
+            List of paths that were reloaded
+        """
+        with self._lock:
+            paths = list(self._handles)
+
+        reloaded = []
+        for path in paths:
+            handle = self._handles[path]
+            stat = self._stat(handle.path)
+            if stat is None or stat == handle.stat:
+                self._pending.pop(handle.path, None)
+                continue
+
+            if self._pending.get(handle.path) != stat:
+                self._pending[handle.path] = stat
+                continue
+            del self._pending[handle.path]
+
+            if file_hash(handle.path) == handle.version:
+                # Touched but not changed; handles are immutable, so swap in a
+                # copy with the new stat
+                with self._lock:
+                    self._handles[handle.path] = ModelHandle(
+                        handle.path, handle.model, handle.version, stat
+                    )
+                continue
+
+            try:
+                new_handle = self._load(handle.path)
+            except Exception as e:
+                print(f"❌ Reload failed for {handle.path.name}: {e}")
+                continue
+
+            # The new model was warmed up by _load(); swap atomically, and
+            # in-flight requests keep their old handle
+            with self._lock:
+                self._handles[handle.path] = new_handle
+            print(f"🔄 Reloaded {handle.path.name} ({handle.version} -> {new_handle.version})")
+
+            reloaded.append(handle.path)
+
+            # Drop our references so the old weights are freed as soon as
+            # the last in-flight request lets go of them
+            del handle, new_handle
+            gc.collect()
+
+        return reloaded
+
+    def start_watching(self, poll_interval=5.0):
+        """
+        Start the background hot-reload thread.
+
+        Args:
+            poll_interval: Seconds between checks
+        """
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop.wait(poll_interval):
+                self.check_for_updates()
+
+        self._stop.clear()
+        self._watcher = threading.Thread(target=watch, name="model-registry-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        """Stop the background hot-reload thread."""
+        if self._watcher is None:
+            return
+        self._stop.set()
+        self._watcher.join()
+        self._watcher = None
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """
+    Get the process-wide model registry.
+
+    Returns:
+        ModelRegistry instance
+    """
+    global _registry
+
+    with _registry_lock:
+        if _registry is None:
+            quantization = load_config().get("quantization", {})
+            _registry = ModelRegistry(variants={
+                "classifier": quantization.get("classifier_variant", "float32"),
+                "autoencoder": quantization.get("autoencoder_variant", "float32")
+            })
+        return _registry
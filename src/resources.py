@@ -0,0 +1,393 @@
+"""
+CPU Thread-Budget Manager for the Waste Segregation System
+
+TensorFlow (classifier, autoencoder), PyTorch (YOLO) and OpenCV share one
+process. Left alone, each sizes its thread pools to every core and they
+oversubscribe the CPU under concurrency. configure_threads() sets all three
+from the ``resources`` block of config.yaml before any model is loaded.
+
+Usage:
+    python -m src.resources autotune --images path/to/images --p99 1.0
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+
+DEFAULT_SETTINGS = {
+    "tf_intra_op_threads": 0,  # 0 keeps the runtime default
+    "tf_inter_op_threads": 0,
+    "torch_threads": 0,
+    "torch_interop_threads": 0,
+    "opencv_threads": -1,  # -1 keeps the OpenCV default
+    "affinity": None  # List of core lists, one per worker
+}
+
+# Settings applied in this process (the first call wins)
+_applied = None
+
+
+def configure_threads(settings=None, worker_index=None):
+    """
+    Apply the thread budget to TensorFlow, PyTorch and OpenCV.
+
+    Must run before the first model is loaded: TensorFlow only accepts thread
+    settings before its runtime initializes. Only the first call in a process
+    takes effect, so a caller (e.g. the benchmark) can fix the settings before
+    importing app.py.
+
+    Args:
+        settings: ``resources`` config block; missing keys use runtime defaults
+        worker_index: Index of this worker for CPU pinning. If None, read from
+            the WORKER_INDEX environment variable.
+
+    Returns:
+        Dictionary of the settings in effect
+    """
+    global _applied
+
+    if _applied is not None:
+        return _applied
+
+    merged = dict(DEFAULT_SETTINGS)
+    merged.update(settings or {})
+
+    # Env vars cover the OpenMP/MKL pools the runtimes create lazily
+    omp_threads = max(merged["tf_intra_op_threads"], merged["torch_threads"])
+    if omp_threads > 0:
+        os.environ["OMP_NUM_THREADS"] = str(omp_threads)
+    if merged["tf_intra_op_threads"] > 0:
+        os.environ["TF_NUM_INTRAOP_THREADS"] = str(merged["tf_intra_op_threads"])
+    if merged["tf_inter_op_threads"] > 0:
+        os.environ["TF_NUM_INTEROP_THREADS"] = str(merged["tf_inter_op_threads"])
+
+    _configure_tensorflow(merged)
+    _configure_torch(merged)
+    _configure_opencv(merged)
+
+    if worker_index is None and "WORKER_INDEX" in os.environ:
+        worker_index = int(os.environ["WORKER_INDEX"])
+    if merged["affinity"] and worker_index is not None:
+        cores = merged["affinity"][worker_index % len(merged["affinity"])]
+        pin_worker(cores)
+
+    _applied = merged
+    return merged
+
+
+def _configure_tensorflow(settings):
+    """Set TensorFlow intra/inter-op thread pools."""
+    try:
+        import tensorflow as tf
+    except ImportError:
+        return
+
+    try:
+        if settings["tf_intra_op_threads"] > 0:
+            tf.config.threading.set_intra_op_parallelism_threads(settings["tf_intra_op_threads"])
+        if settings["tf_inter_op_threads"] > 0:
+            tf.config.threading.set_inter_op_parallelism_threads(settings["tf_inter_op_threads"])
+    except RuntimeError:
+        print("⚠️ TensorFlow already initialized, thread settings not applied")
+
+
+def _configure_torch(settings):
+    """Set PyTorch intra/inter-op thread pools."""
+    try:
+        import torch
+    except ImportError:
+        return
+
+    if settings["torch_threads"] > 0:
+        torch.set_num_threads(settings["torch_threads"])
+    if settings["torch_interop_threads"] > 0:
+        try:
+            torch.set_num_interop_threads(settings["torch_interop_threads"])
+        except RuntimeError:
+            print("⚠️ PyTorch inter-op pool already started, setting not applied")
+
+
+def _configure_opencv(settings):
+    """Set the OpenCV thread pool."""
+    if settings["opencv_threads"] < 0:
+        return
+
+    import cv2
+    cv2.setNumThreads(settings["opencv_threads"])
+
+
+def threads_in_effect():
+    """
+    Thread counts the runtimes actually report.
+
+    Returns:
+        Dictionary with the same keys as DEFAULT_SETTINGS, for the runtimes
+        that are installed
+    """
+    effective = {}
+    try:
+        import tensorflow as tf
+        effective["tf_intra_op_threads"] = tf.config.threading.get_intra_op_parallelism_threads()
+        effective["tf_inter_op_threads"] = tf.config.threading.get_inter_op_parallelism_threads()
+    except ImportError:
+        pass
+    try:
+        import torch
+        effective["torch_threads"] = torch.get_num_threads()
+        effective["torch_interop_threads"] = torch.get_num_interop_threads()
+    except ImportError:
+        pass
+    try:
+        import cv2
+        effective["opencv_threads"] = cv2.getNumThreads()
+    except ImportError:
+        pass
+    return effective
+
+
+def pin_worker(cores):
+    """
+    Pin the current process to a set of CPU cores.
+
+    Args:
+        cores: List of core indices
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        print("⚠️ CPU affinity is not supported on this platform")
+        return
+
+    os.sched_setaffinity(0, set(cores))
+
+
+def _benchmark_images(images_dir, count=16):
+    """Image paths from a folder, or synthetic images if none are given."""
+    if images_dir is not None:
+        paths = sorted(
+            p for p in Path(images_dir).rglob("*")
+            if p.suffix.lower() in {".jpg", ".jpeg", ".png", ".webp"}
+        )
+        if paths:
+            return paths
+
+    import cv2
+
+    tmp_dir = Path(tempfile.mkdtemp(prefix="waste_bench_"))
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        path = tmp_dir / f"synthetic_{i:03d}.jpg"
+        cv2.imwrite(str(path), rng.integers(0, 256, (480, 640, 3), dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+def run_benchmark(settings, concurrency, images_dir=None, requests=50):
+    """
+    Measure analyze_image() throughput and latency under one thread budget.
+
+    Loads the models, so it must run in a fresh process for each setting.
+
+    Args:
+        settings: ``resources`` settings to apply
+        concurrency: Number of concurrent callers
+        images_dir: Folder of benchmark images (synthetic images if None)
+        requests: Number of timed requests
+
+    Returns:
+        Dictionary with throughput and latency percentiles
+    """
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+    # Under "python -m src.resources" this module is __main__, and app.py
+    # imports a second copy as src.resources whose first configure_threads()
+    # call would win. Apply the budget through that copy instead.
+    import src.resources as resources
+    resources.configure_threads(settings)
+
+    # Imported after configure_threads so the models load under the budget
+    import app
+    from src.degradation import DegradationPolicy
+
+    effective = threads_in_effect()
+    mismatched = {
+        key: (value, effective[key]) for key, value in settings.items()
+        if key in effective and isinstance(value, int) and value > 0 and effective[key] != value
+    }
+    if mismatched:
+        raise RuntimeError(f"Thread settings not in effect (requested, actual): {mismatched}")
+
+    # Measure the full pipeline, not whatever level the ladder settles on
+    app.degradation = DegradationPolicy(levels=[{"name": "full"}])
+
+    paths = _benchmark_images(images_dir)
+    app.analyze_image(paths[0])  # Warm-up
+
+    def timed(i):
+        start = time.perf_counter()
+        app.analyze_image(paths[i % len(paths)])
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "settings": settings,
+        "effective": effective,
+        "concurrency": concurrency,
+        "requests": requests,
+        "throughput": requests / elapsed,
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95)),
+        "p99": float(np.percentile(latencies, 99))
+    }
+
+
+def candidate_settings(thread_counts, interop_counts):
+    """
+    Grid of thread budgets to sweep.
+
+    Args:
+        thread_counts: Intra-op thread counts to try (shared by TF and torch)
+        interop_counts: Inter-op thread counts to try
+
+    Returns:
+        List of settings dictionaries
+    """
+    candidates = []
+    for threads in thread_counts:
+        for interop in interop_counts:
+            candidates.append({
+                "tf_intra_op_threads": threads,
+                "tf_inter_op_threads": interop,
+                "torch_threads": threads,
+                "torch_interop_threads": interop,
+                "opencv_threads": 1
+            })
+    return candidates
+
+
+def autotune(images_dir=None, p99_target=1.0, thread_counts=None, interop_counts=(1, 2),
+             concurrencies=(1, 2, 4), requests=50):
+    """
+    Sweep thread budgets and concurrency levels and recommend the best one.
+
+    Each configuration runs in a fresh subprocess, since the runtimes only
+    accept thread settings once per process.
+
+    Args:
+        images_dir: Folder of benchmark images (synthetic images if None)
+        p99_target: Maximum acceptable p99 latency in seconds
+        thread_counts: Intra-op thread counts to try (default: powers of two up to the core count)
+        interop_counts: Inter-op thread counts to try
+        concurrencies: Concurrent caller counts to try
+        requests: Timed requests per configuration
+
+    Returns:
+        Tuple of (best result or None, list of all results)
+    """
+    cores = os.cpu_count() or 1
+    if thread_counts is None:
+        thread_counts = [t for t in (1, 2, 4, 8, 16) if t <= cores] or [1]
+
+    results = []
+    for settings in candidate_settings(thread_counts, interop_counts):
+        for concurrency in concurrencies:
+            # Skip budgets that oversubscribe the machine by more than 2x
+            if settings["tf_intra_op_threads"] * concurrency > 2 * cores:
+                continue
+
+            cmd = [
+                sys.executable, "-m", "src.resources", "bench",
+                "--settings", json.dumps(settings),
+                "--concurrency", str(concurrency),
+                "--requests", str(requests)
+            ]
+            if images_dir is not None:
+                cmd += ["--images", str(images_dir)]
+
+            proc = subprocess.run(
+                cmd, capture_output=True, text=True,
+                cwd=str(Path(__file__).parent.parent)
+            )
+            if proc.returncode != 0:
+                print(f"   ❌ Failed: {settings} x{concurrency}")
+                continue
+
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            results.append(result)
+            print(f"   threads={settings['tf_intra_op_threads']} interop={settings['tf_inter_op_threads']} "
+                  f"concurrency={concurrency}: {result['throughput']:.2f} img/s, "
+                  f"p99={result['p99'] * 1000:.0f}ms")
+
+    within_target = [r for r in results if r["p99"] <= p99_target]
+    best = max(within_target, key=lambda r: r["throughput"]) if within_target else None
+    return best, results
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="CPU thread-budget tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    tune = subparsers.add_parser("autotune", help="Sweep thread budgets and recommend one")
+    tune.add_argument("--images", default=None, help="Folder of benchmark images")
+    tune.add_argument("--p99", type=float, default=1.0, help="p99 latency target in seconds")
+    tune.add_argument("--threads", type=int, nargs="+", default=None)
+    tune.add_argument("--interop", type=int, nargs="+", default=[1, 2])
+    tune.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4])
+    tune.add_argument("--requests", type=int, default=50)
+    tune.add_argument("--output", default=None, help="Write all results to this JSON file")
+
+    bench = subparsers.add_parser("bench", help="Benchmark one configuration (used by autotune)")
+    bench.add_argument("--settings", required=True, help="Settings as JSON")
+    bench.add_argument("--concurrency", type=int, default=1)
+    bench.add_argument("--images", default=None)
+    bench.add_argument("--requests", type=int, default=50)
+
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        result = run_benchmark(json.loads(args.settings), args.concurrency, args.images, args.requests)
+        print(json.dumps(result))
+        return
+
+    print("🔄 Sweeping thread budgets...")
+    best, results = autotune(
+        images_dir=args.images,
+        p99_target=args.p99,
+        thread_counts=args.threads,
+        interop_counts=args.interop,
+        concurrencies=args.concurrency,
+        requests=args.requests
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if best is None:
+        print(f"❌ No configuration met the p99 target of {args.p99 * 1000:.0f}ms")
+        return
+
+    print(f"\n✅ Best: {best['throughput']:.2f} img/s at p99 {best['p99'] * 1000:.0f}ms "
+          f"with {best['concurrency']} concurrent workers")
+    print("\nRecommended config.yaml settings:")
+    print("resources:")
+    for key, value in best["settings"].items():
+        print(f"  {key}: {value}")
+    print(f"serving:\n  workers: {best['concurrency']}")
+
+
+if __name__ == "__main__":
+    main()
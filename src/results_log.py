@@ -0,0 +1,483 @@
+"""
+Append-Only Results Log for the Waste Segregation System
+
+Analysis results are queued by the request thread and written in batches by
+a background thread, so logging never slows a request down. Each result
+becomes a fixed-size binary record in a log file rotated by time, and the
+same batch updates hourly per-class aggregates (counts, anomalies and a
+confidence histogram) in a SQLite database. Dashboard queries read the
+aggregates and never scan the raw records.
+
+Usage:
+    python -m src.results_log hourly --days 30
+    python -m src.results_log summary --days 7
+"""
+
+import argparse
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from src.utils.helpers import get_project_root, load_config
+
+
+# One packed 21-byte record per analyzed image
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),   # Unix seconds
+    ("class_id", "<i2"),    # -1 if the image was not classified
+    ("confidence", "<f4"),  # NaN if the image was not classified
+    ("anomaly", "i1"),      # 1/0, or -1 if the anomaly check was skipped
+    ("error", "<f4"),       # Reconstruction error, NaN if unknown
+    ("level", "i1"),        # Degradation level index
+    ("detected", "i1")      # 1/0, or -1 if detection was skipped
+])
+
+BUCKET_SECONDS = 3600
+HISTOGRAM_BINS = 10
+
+_HIST_COLUMNS = [f"h{i}" for i in range(HISTOGRAM_BINS)]
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS classes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS hourly (
+    bucket INTEGER NOT NULL,
+    class_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    anomaly_checked INTEGER NOT NULL,
+    anomalies INTEGER NOT NULL,
+    confidence_sum REAL NOT NULL,
+    {", ".join(f"{c} INTEGER NOT NULL" for c in _HIST_COLUMNS)},
+    PRIMARY KEY (bucket, class_id)
+) WITHOUT ROWID;
+"""
+
+_UPSERT = f"""
+INSERT INTO hourly (bucket, class_id, count, anomaly_checked, anomalies, confidence_sum, {", ".join(_HIST_COLUMNS)})
+VALUES ({", ".join("?" * (6 + HISTOGRAM_BINS))})
+ON CONFLICT (bucket, class_id) DO UPDATE SET
+    count = count + excluded.count,
+    anomaly_checked = anomaly_checked + excluded.anomaly_checked,
+    anomalies = anomalies + excluded.anomalies,
+    confidence_sum = confidence_sum + excluded.confidence_sum,
+    {", ".join(f"{c} = {c} + excluded.{c}" for c in _HIST_COLUMNS)}
+"""
+
+
+def _flag(value):
+    """Encode an optional boolean as 1/0/-1."""
+    return -1 if value is None else int(bool(value))
+
+
+def extract_fields(result):
+    """
+    Loggable fields of an analysis result.
+
+    Accepts both the Flask app's result format (nested ``classification``,
+    ``anomaly`` and ``detection`` blocks) and the flat format returned by
+    ``WasteSegregationPipeline.analyze``.
+
+    Args:
+        result: Analysis result dictionary
+
+    Returns:
+        Tuple of (class name, confidence, anomaly, error, level, detected)
+    """
+    level = (result.get("degradation") or {}).get("level", 0)
+
+    if "waste_type" in result:
+        checked = result.get("anomaly_score") is not None
+        return (result["waste_type"], result["confidence"],
+                result["is_anomaly"] if checked else None, None, level, None)
+
+    classification = result.get("classification") or {}
+    anomaly = result.get("anomaly") or {}
+    detection = result.get("detection") or {}
+    return (
+        classification.get("waste_type"),
+        classification.get("confidence"),
+        anomaly.get("is_anomaly"),
+        anomaly.get("reconstruction_error"),
+        level,
+        detection.get("detected")
+    )
+
+
+class ResultsLog:
+    """
+    Asynchronous, batched sink for analysis results.
+    """
+
+    def __init__(self, root, rotation_interval=3600, retention_days=None, batch_size=256,
+                 flush_interval=1.0, queue_size=10000):
+        """
+        Initialize the log directory and aggregate database.
+
+        Args:
+            root: Directory holding the log files and ``aggregates.db``
+            rotation_interval: Seconds covered by each log file
+            retention_days: Days of raw log files to keep (None keeps all;
+                aggregates are always kept)
+            batch_size: Maximum records per write
+            flush_interval: Maximum seconds a record waits before being written
+            queue_size: Records buffered before new ones are dropped
+        """
+        self.root = Path(root)
+        self.rotation_interval = rotation_interval
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer = None
+        self._class_ids = {}
+        self._stats_lock = threading.Lock()
+        self._written = 0
+        self._dropped = 0
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.root / "aggregates.db"
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")  # Readers do not block the writer
+            conn.executescript(_SCHEMA)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Create a log from the ``results_log`` block of config.yaml.
+
+        Args:
+            config: Full configuration dictionary
+
+        Returns:
+            ResultsLog instance, or None if the log is disabled
+        """
+        settings = config.get("results_log", {})
+        if not settings.get("enabled", False):
+            return None
+
+        root = Path(settings.get("directory", "outputs/results"))
+        if not root.is_absolute():
+            root = get_project_root() / root
+        return cls(
+            root,
+            rotation_interval=settings.get("rotation_hours", 1) * 3600,
+            retention_days=settings.get("retention_days"),
+            batch_size=settings.get("batch_size", 256),
+            flush_interval=settings.get("flush_interval", 1.0),
+            queue_size=settings.get("queue_size", 10000)
+        )
+
+    def _connect(self):
+        """New connection to the aggregate database."""
+        return sqlite3.connect(self.db_path, timeout=30.0)
+
+    def record(self, result, timestamp=None):
+        """
+        Queue a result for logging without blocking.
+
+        Results that arrive while the queue is full are dropped and counted.
+
+        Args:
+            result: Analysis result dictionary
+            timestamp: Unix time of the analysis (defaults to now)
+        """
+        fields = extract_fields(result)
+        try:
+            self._queue.put_nowait((timestamp or time.time(),) + fields)
+        except queue.Full:
+            with self._stats_lock:
+                self._dropped += 1
+
+    def start(self):
+        """Start the background writer thread."""
+        if self._writer is not None:
+            return
+        self._writer = threading.Thread(target=self._run, name="results-log-writer", daemon=True)
+        self._writer.start()
+
+    def close(self):
+        """Write everything still queued and stop the writer thread."""
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join()
+        self._writer = None
+
+    def _run(self):
+        """Writer loop: collect a batch, write it, repeat until closed."""
+        last_cleanup = 0.0
+        running = True
+        while running:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            running = item is not None
+
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    self._class_ids.clear()  # Ids from a rolled-back transaction may be stale
+                    print(f"⚠️ Results log: failed to write {len(batch)} records: {e}")
+
+            if self.retention_days and time.monotonic() - last_cleanup > 3600:
+                self.remove_expired()
+                last_cleanup = time.monotonic()
+
+    def _class_id(self, conn, name):
+        """Stable integer id of a class name."""
+        if name not in self._class_ids:
+            conn.execute("INSERT OR IGNORE INTO classes (name) VALUES (?)", (name,))
+            (self._class_ids[name],) = conn.execute(
+                "SELECT id FROM classes WHERE name = ?", (name,)
+            ).fetchone()
+        return self._class_ids[name]
+
+    def _write(self, batch):
+        """Append a batch to the log files and fold it into the hourly aggregates."""
+        with self._connect() as conn:
+            records = np.empty(len(batch), dtype=RECORD_DTYPE)
+            for i, (ts, name, confidence, anomaly, error, level, detected) in enumerate(batch):
+                records[i] = (
+                    ts,
+                    -1 if name is None else self._class_id(conn, name),
+                    math.nan if confidence is None else confidence,
+                    _flag(anomaly),
+                    math.nan if error is None else error,
+                    level,
+                    _flag(detected)
+                )
+
+            # One append per log file; O_APPEND keeps concurrent workers'
+            # batches from interleaving mid-record
+            files = records["timestamp"] // self.rotation_interval
+            for file_bucket in np.unique(files):
+                chunk = records[files == file_bucket].tobytes()
+                fd = os.open(self._log_path(file_bucket * self.rotation_interval),
+                             os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, chunk)
+                finally:
+                    os.close(fd)
+
+            conn.executemany(_UPSERT, self._aggregate(records))
+
+        with self._stats_lock:
+            self._written += len(batch)
+
+    @staticmethod
+    def _aggregate(records):
+        """Hourly per-class rows for a batch of records."""
+        classified = records[records["class_id"] >= 0]
+        buckets = (classified["timestamp"] // BUCKET_SECONDS).astype(np.int64) * BUCKET_SECONDS
+        bins = np.clip((classified["confidence"] * HISTOGRAM_BINS).astype(int), 0, HISTOGRAM_BINS - 1)
+
+        rows = []
+        keys = np.stack([buckets, classified["class_id"].astype(np.int64)], axis=1)
+        for bucket, class_id in np.unique(keys, axis=0):
+            mask = (buckets == bucket) & (classified["class_id"] == class_id)
+            group = classified[mask]
+            histogram = np.bincount(bins[mask], minlength=HISTOGRAM_BINS)
+            rows.append((
+                int(bucket), int(class_id), len(group),
+                int(np.sum(group["anomaly"] >= 0)),
+                int(np.sum(group["anomaly"] == 1)),
+                float(group["confidence"].sum()),
+                *(int(n) for n in histogram)
+            ))
+        return rows
+
+    def _log_path(self, start):
+        """Path of the log file covering the interval starting at ``start``."""
+        stamp = datetime.fromtimestamp(start, tz=timezone.utc).strftime("%Y%m%dT%H%M")
+        return self.root / f"results_{stamp}.bin"
+
+    def remove_expired(self):
+        """
+        Delete raw log files older than the retention period.
+
+        Returns:
+            Number of files removed
+        """
+        cutoff = time.time() - self.retention_days * 86400
+        removed = 0
+        for path in self.root.glob("results_*.bin"):
+            start = datetime.strptime(path.stem[len("results_"):], "%Y%m%dT%H%M")
+            if start.replace(tzinfo=timezone.utc).timestamp() + self.rotation_interval < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def read_records(self, start, end):
+        """
+        Raw records in a time range, read from the log files.
+
+        Args:
+            start: Range start (Unix seconds)
+            end: Range end (Unix seconds)
+
+        Returns:
+            Structured numpy array with RECORD_DTYPE
+        """
+        chunks = []
+        first = int(start // self.rotation_interval)
+        last = int(end // self.rotation_interval)
+        for file_bucket in range(first, last + 1):
+            path = self._log_path(file_bucket * self.rotation_interval)
+            if path.exists():
+                # Ignore a trailing partial record from an interrupted write
+                count = path.stat().st_size // RECORD_DTYPE.itemsize
+                records = np.fromfile(path, dtype=RECORD_DTYPE, count=count)
+                chunks.append(records[(records["timestamp"] >= start) & (records["timestamp"] < end)])
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=RECORD_DTYPE)
+
+    def class_names(self):
+        """Mapping of class ids to names."""
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT id, name FROM classes"))
+
+    def hourly_counts(self, start, end):
+        """
+        Per-class counts for each hour in a time range.
+
+        Args:
+            start: Range start (Unix seconds)
+            end: Range end (Unix seconds)
+
+        Returns:
+            List of dictionaries with hour (ISO, UTC), class, count and anomalies
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT h.bucket, c.name, h.count, h.anomalies FROM hourly h "
+                "JOIN classes c ON c.id = h.class_id "
+                "WHERE h.bucket >= ? AND h.bucket < ? ORDER BY h.bucket, c.name",
+                (int(start // BUCKET_SECONDS * BUCKET_SECONDS), int(end))
+            ).fetchall()
+
+        return [{
+            "hour": datetime.fromtimestamp(bucket, tz=timezone.utc).isoformat(),
+            "class": name,
+            "count": count,
+            "anomalies": anomalies
+        } for bucket, name, count, anomalies in rows]
+
+    def summary(self, start, end):
+        """
+        Per-class totals over a time range.
+
+        Args:
+            start: Range start (Unix seconds)
+            end: Range end (Unix seconds)
+
+        Returns:
+            Dictionary of class name -> count, anomaly rate, mean confidence
+            and confidence histogram
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT c.name, SUM(h.count), SUM(h.anomaly_checked), SUM(h.anomalies), "
+                f"SUM(h.confidence_sum), {', '.join(f'SUM(h.{c})' for c in _HIST_COLUMNS)} "
+                "FROM hourly h JOIN classes c ON c.id = h.class_id "
+                "WHERE h.bucket >= ? AND h.bucket < ? GROUP BY c.name ORDER BY c.name",
+                (int(start // BUCKET_SECONDS * BUCKET_SECONDS), int(end))
+            ).fetchall()
+
+        return {
+            name: {
+                "count": count,
+                "anomaly_rate": anomalies / checked if checked else None,
+                "mean_confidence": confidence_sum / count,
+                "confidence_histogram": list(histogram)
+            }
+            for name, count, checked, anomalies, confidence_sum, *histogram in rows
+        }
+
+    def stats(self):
+        """
+        Writer counters.
+
+        Returns:
+            Dictionary with records written, dropped and still queued
+        """
+        with self._stats_lock:
+            return {"written": self._written, "dropped": self._dropped, "queued": self._queue.qsize()}
+
+
+_results_log = None
+_results_log_lock = threading.Lock()
+
+
+def get_results_log():
+    """
+    Process-wide results log configured from config.yaml.
+
+    Returns:
+        Started ResultsLog, or None if ``results_log.enabled`` is false
+    """
+    global _results_log
+    with _results_log_lock:
+        if _results_log is None:
+            _results_log = ResultsLog.from_config(load_config()) or False
+            if _results_log:
+                import atexit
+                _results_log.start()
+                atexit.register(_results_log.close)
+        return _results_log or None
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Query the analysis results log")
+    parser.add_argument("query", choices=["hourly", "summary"])
+    parser.add_argument("--days", type=float, default=30.0, help="Time range ending now")
+    args = parser.parse_args()
+
+    log = ResultsLog.from_config(load_config())
+    if log is None:
+        print("❌ results_log is disabled in config/config.yaml")
+        return
+
+    end = time.time()
+    start = end - args.days * 86400
+    began = time.perf_counter()
+    if args.query == "hourly":
+        rows = log.hourly_counts(start, end)
+        elapsed = time.perf_counter() - began
+        for row in rows:
+            print(f"   {row['hour']}  {row['class']:<12} {row['count']:>6}  ({row['anomalies']} anomalies)")
+    else:
+        summary = log.summary(start, end)
+        elapsed = time.perf_counter() - began
+        for name, totals in summary.items():
+            rate = totals["anomaly_rate"]
+            rate = f"{rate:.1%}" if rate is not None else "n/a"
+            print(f"   {name:<12} {totals['count']:>8}  confidence {totals['mean_confidence']:.1%}  "
+                  f"anomalies {rate}")
+    print(f"⏱️ Query took {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
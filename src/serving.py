@@ -0,0 +1,218 @@
+"""
+Admission Control for the Async Serving Mode of the Waste Segregation System
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Overloaded(Exception):
+    """
+    Raised when a request cannot be admitted or finished in time.
+    """
+
+    def __init__(self, status_code, reason, retry_after):
+        """
+        Args:
+            status_code: HTTP status to answer with (429 or 503)
+            reason: Human-readable reason for the rejection
+            retry_after: Seconds the client should wait before retrying
+        """
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ClientDisconnected(Exception):
+    """
+    Raised when the client went away while its request was still queued.
+    """
+
+
+class Reservation:
+    """
+    A claimed place in the admission queue, released once the request gets a
+    worker or gives up. Carries the request's deadline, stamped on arrival.
+    """
+
+    def __init__(self, controller, deadline):
+        self._controller = controller
+        self.deadline = deadline  # time.monotonic() value
+        self.active = True
+
+    def release(self):
+        """Give the queue place back (idempotent)."""
+        if self.active:
+            self.active = False
+            self._controller._queued -= 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class AdmissionController:
+    """
+    Bounded admission queue in front of a thread pool running CPU-bound inference.
+
+    At most ``workers`` jobs run at once and at most ``queue_size`` more may
+    wait for a worker. Anything beyond that is rejected immediately with 429.
+    Requests that cannot start and finish within ``request_timeout`` seconds
+    of arrival are answered with 503.
+    """
+
+    def __init__(self, workers=2, queue_size=8, request_timeout=10.0,
+                 retry_after=2, disconnect_poll_interval=0.25):
+        """
+        Initialize the admission controller.
+
+        Args:
+            workers: Number of inference jobs allowed to run concurrently
+            queue_size: Number of requests allowed to wait for a worker
+            request_timeout: Per-request deadline in seconds, measured from arrival
+            retry_after: Seconds advertised to rejected clients
+            disconnect_poll_interval: Seconds between disconnect checks while queued
+        """
+        self.workers = workers
+        self.queue_size = queue_size
+        self.request_timeout = request_timeout
+        self.retry_after = retry_after
+        self.disconnect_poll_interval = disconnect_poll_interval
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        self._slots = asyncio.Semaphore(workers)
+        self._running = 0
+        self._queued = 0
+
+        self.stats = {
+            "admitted": 0,
+            "completed": 0,
+            "rejected_queue_full": 0,
+            "rejected_deadline": 0,
+            "cancelled_disconnect": 0
+        }
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Create a controller from the ``serving`` block of config.yaml.
+
+        Args:
+            config: Full configuration dictionary
+
+        Returns:
+            AdmissionController instance
+        """
+        serving = config.get("serving", {})
+        return cls(
+            workers=serving.get("workers", 2),
+            queue_size=serving.get("queue_size", 8),
+            request_timeout=serving.get("request_timeout", 10.0),
+            retry_after=serving.get("retry_after", 2),
+            disconnect_poll_interval=serving.get("disconnect_poll_interval", 0.25)
+        )
+
+    @property
+    def queue_depth(self):
+        """Number of requests currently waiting for a worker."""
+        return self._queued
+
+    @property
+    def in_flight(self):
+        """Number of inference jobs currently running."""
+        return self._running
+
+    def reserve(self):
+        """
+        Claim a place in the admission queue, or reject immediately when full.
+
+        Call this before reading the request body so that overload is shed
+        without buffering uploads, then pass the reservation to ``run()``.
+        Admission is decided on the counters, which are updated synchronously,
+        so requests arriving in the same event-loop tick cannot all get in.
+
+        Returns:
+            Reservation
+
+        Raises:
+            Overloaded: All workers are busy and the queue is full (429)
+        """
+        if self._running + self._queued >= self.workers + self.queue_size:
+            self.stats["rejected_queue_full"] += 1
+            raise Overloaded(429, "Server busy, admission queue is full", self.retry_after)
+
+        self._queued += 1
+        return Reservation(self, time.monotonic() + self.request_timeout)
+
+    async def run(self, fn, *args, is_disconnected=None, reservation=None):
+        """
+        Run ``fn(*args)`` on the inference executor once a worker is free.
+
+        Args:
+            fn: Blocking callable to run
+            *args: Arguments for ``fn``
+            is_disconnected: Optional coroutine function returning True once
+                the client has gone away; queued work is then dropped
+            reservation: Queue place from ``reserve()``; claimed here if None
+
+        Returns:
+            Return value of ``fn``
+
+        Raises:
+            Overloaded: Queue is full (429) or the deadline passed (503)
+            ClientDisconnected: Client disconnected while the request was queued
+        """
+        loop = asyncio.get_running_loop()
+
+        if reservation is None:
+            reservation = self.reserve()
+        # The deadline runs from arrival, including the time spent reading the body
+        deadline = reservation.deadline
+        with reservation:
+            await self._acquire(deadline, is_disconnected)
+
+        self.stats["admitted"] += 1
+        self._running += 1
+        future = loop.run_in_executor(self._executor, fn, *args)
+        future.add_done_callback(self._release)
+
+        try:
+            # Shield the executor future: a worker thread cannot be interrupted,
+            # so its slot is only released once it actually finishes.
+            return await asyncio.wait_for(asyncio.shield(future), deadline - time.monotonic())
+        except asyncio.TimeoutError:
+            self.stats["rejected_deadline"] += 1
+            raise Overloaded(503, "Request deadline exceeded", self.retry_after)
+
+    async def _acquire(self, deadline, is_disconnected):
+        """Wait for a free worker slot, honouring the deadline and client disconnects."""
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.stats["rejected_deadline"] += 1
+                raise Overloaded(503, "Request deadline exceeded while queued", self.retry_after)
+
+            try:
+                await asyncio.wait_for(
+                    self._slots.acquire(),
+                    min(remaining, self.disconnect_poll_interval)
+                )
+                return
+            except asyncio.TimeoutError:
+                if is_disconnected is not None and await is_disconnected():
+                    self.stats["cancelled_disconnect"] += 1
+                    raise ClientDisconnected()
+
+    def _release(self, future):
+        """Free the worker slot held by a finished executor job."""
+        self._running -= 1
+        self.stats["completed"] += 1
+        self._slots.release()
+
+    def shutdown(self):
+        """Stop the executor, waiting for running jobs to finish."""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,253 @@
+"""
+Content-Addressed Upload Store for the Waste Segregation System
+
+Uploads are named by the SHA-256 of their contents and sharded into
+subdirectories (``ab/cd/abcd....jpg``), so identical images are stored once
+and two uploads with the same filename never collide. A background thread
+evicts least-recently-used files to keep the store within a byte and age
+budget, using an in-memory index instead of rescanning the directory.
+
+The index only sees the writes of its own process. When several server
+workers share the store, each one rebuilds its index from disk every
+``rescan_interval`` seconds, so the budget covers every worker's files
+rather than growing to N times ``max_bytes``.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+class UploadStore:
+    """
+    Bounded, deduplicating store of uploaded images.
+    """
+
+    def __init__(self, root, max_bytes=None, max_age=None, shard_depth=2, eviction_interval=60.0,
+                 rescan_interval=600.0):
+        """
+        Initialize the store and index the files already on disk.
+
+        Args:
+            root: Directory holding the store
+            max_bytes: Total size budget in bytes (None disables)
+            max_age: Maximum seconds since last use (None disables)
+            shard_depth: Number of two-character subdirectory levels
+            eviction_interval: Seconds between background eviction passes
+            rescan_interval: Seconds between rebuilds of the index from disk,
+                which pick up files written by other processes (None disables)
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.shard_depth = shard_depth
+        self.eviction_interval = eviction_interval
+        self.rescan_interval = rescan_interval
+
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # Hash -> [relative path, size, last access], oldest first
+        self._total_bytes = 0
+
+        self._evictor = None
+        self._stop = threading.Event()
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    @classmethod
+    def from_config(cls, root, config):
+        """
+        Create a store from the ``uploads`` block of config.yaml.
+
+        Args:
+            root: Directory holding the store
+            config: Full configuration dictionary
+
+        Returns:
+            UploadStore instance
+        """
+        uploads = config.get("uploads", {})
+        max_age_days = uploads.get("max_age_days")
+        return cls(
+            root,
+            max_bytes=uploads.get("max_bytes"),
+            max_age=max_age_days * 86400 if max_age_days else None,
+            shard_depth=uploads.get("shard_depth", 2),
+            eviction_interval=uploads.get("eviction_interval", 60.0),
+            rescan_interval=uploads.get("rescan_interval", 600.0)
+        )
+
+    def _scan(self):
+        """Index of the files on disk, least recently used first."""
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.startswith("."):
+                    continue  # Leftover temp files from an interrupted write
+                path = Path(dirpath) / filename
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue  # Evicted by another process mid-scan
+                entries.append((st.st_mtime, path.stem, path.relative_to(self.root).as_posix(), st.st_size))
+
+        index = OrderedDict()
+        for mtime, digest, relpath, size in sorted(entries):
+            index[digest] = [relpath, size, mtime]
+        return index
+
+    def _load_index(self):
+        """Index existing files once at startup."""
+        self._index = self._scan()
+        self._total_bytes = sum(entry[1] for entry in self._index.values())
+
+    def rescan(self):
+        """
+        Rebuild the index from disk, picking up files written and removed by
+        other processes sharing the store.
+
+        Recency survives the rebuild because ``put()`` persists it as mtime.
+        """
+        index = self._scan()
+        with self._lock:
+            self._index = index
+            self._total_bytes = sum(entry[1] for entry in index.values())
+
+    def _relpath(self, digest, extension):
+        """Sharded relative path for a content hash."""
+        shards = [digest[2 * i:2 * i + 2] for i in range(self.shard_depth)]
+        return "/".join(shards + [f"{digest}.{extension}"])
+
+    def put(self, data, extension):
+        """
+        Store image bytes, reusing the existing file if the content is known.
+
+        Args:
+            data: File contents
+            extension: File extension without the dot
+
+        Returns:
+            Path of the stored file relative to the store root
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        now = time.time()
+
+        with self._lock:
+            entry = self._index.get(digest)
+            if entry is not None:
+                entry[2] = now
+                self._index.move_to_end(digest)
+                relpath = entry[0]
+
+        if entry is not None:
+            try:
+                # Persist recency so the LRU order survives a restart
+                os.utime(self.root / relpath, (now, now))
+                return relpath
+            except FileNotFoundError:
+                pass  # Removed behind our back; write it again
+
+        relpath = self._relpath(digest, extension.lower())
+        path = self.root / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file in the same directory, then rename atomically,
+        # so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o644)  # mkstemp creates owner-only files
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            old = self._index.pop(digest, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+            self._index[digest] = [relpath, len(data), now]
+            self._total_bytes += len(data)
+
+        return relpath
+
+    def path(self, relpath):
+        """
+        Absolute path of a stored file.
+
+        Args:
+            relpath: Path returned by ``put()``
+
+        Returns:
+            Path
+        """
+        return self.root / relpath
+
+    def evict(self):
+        """
+        Remove least-recently-used files until the store is within budget.
+
+        Returns:
+            Number of files removed
+        """
+        cutoff = time.time() - self.max_age if self.max_age else None
+        removed = 0
+
+        # Unlink while holding the lock: otherwise a put() of the same content
+        # between dropping the entry and the unlink would lose its new file
+        with self._lock:
+            while self._index:
+                digest, (relpath, size, last_access) = next(iter(self._index.items()))
+                over_budget = self.max_bytes is not None and self._total_bytes > self.max_bytes
+                expired = cutoff is not None and last_access < cutoff
+                if not (over_budget or expired):
+                    break
+                del self._index[digest]
+                self._total_bytes -= size
+                try:
+                    os.unlink(self.root / relpath)
+                except FileNotFoundError:
+                    pass
+                removed += 1
+
+        return removed
+
+    def stats(self):
+        """
+        Current size of the store.
+
+        Returns:
+            Dictionary with file count and total bytes
+        """
+        with self._lock:
+            return {"files": len(self._index), "bytes": self._total_bytes}
+
+    def start_eviction(self):
+        """Start the background eviction thread."""
+        if self._evictor is not None:
+            return
+
+        def run():
+            last_rescan = time.monotonic()
+            while not self._stop.wait(self.eviction_interval):
+                if self.rescan_interval is not None and time.monotonic() - last_rescan >= self.rescan_interval:
+                    self.rescan()
+                    last_rescan = time.monotonic()
+                self.evict()
+
+        self._stop.clear()
+        self._evictor = threading.Thread(target=run, name="upload-store-evictor", daemon=True)
+        self._evictor.start()
+
+    def stop_eviction(self):
+        """Stop the background eviction thread."""
+        if self._evictor is None:
+            return
+        self._stop.set()
+        self._evictor.join()
+        self._evictor = None
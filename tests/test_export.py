@@ -0,0 +1,104 @@
+"""
+Parity of the in-graph normalization (src/export.py) with the host-side
+preprocessing it replaced, on small randomly initialized models.
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+tf = pytest.importorskip("tensorflow")
+keras = tf.keras
+
+from src.export import check_parity, ensure_uint8_input, takes_uint8, wrap_autoencoder, wrap_classifier
+
+
+def _classifier():
+    inputs = keras.Input(shape=(32, 32, 3))
+    x = keras.layers.Conv2D(4, 3, activation="relu")(inputs)
+    x = keras.layers.GlobalAveragePooling2D()(x)
+    outputs = keras.layers.Dense(4, activation="softmax")(x)
+    return keras.Model(inputs, outputs)
+
+
+def _autoencoder():
+    inputs = keras.Input(shape=(16, 16, 3))
+    x = keras.layers.Conv2D(8, 3, padding="same", activation="relu")(inputs)
+    outputs = keras.layers.Conv2D(3, 1, activation="sigmoid")(x)
+    return keras.Model(inputs, outputs)
+
+
+@pytest.fixture(scope="module")
+def images():
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (48, 40, 3), dtype=np.uint8) for _ in range(6)]
+
+
+@pytest.mark.parametrize("preprocessing", ["efficientnet", "unit"])
+def test_wrapped_models_match_host_preprocessing(images, preprocessing):
+    passed, report = check_parity(_classifier(), _autoencoder(), images, preprocessing)
+
+    assert passed, report
+    assert report["classifier_argmax_agreement"] == 1.0
+
+
+def _legacy_preprocess_for_classifier(image, target_size, preprocessing):
+    """app.preprocess_for_classifier before normalization moved into the model."""
+    from PIL import Image
+    import cv2
+
+    img = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    img = img.resize(target_size, Image.Resampling.LANCZOS)
+    img_array = np.array(img, dtype=np.float32)
+
+    if preprocessing == "efficientnet":
+        from tensorflow.keras.applications.efficientnet import preprocess_input
+        return preprocess_input(np.expand_dims(img_array, axis=0))
+    return np.expand_dims(img_array / 255.0, axis=0)
+
+
+def _legacy_preprocess_for_autoencoder(image, target_size):
+    """app.preprocess_for_autoencoder before normalization moved into the model."""
+    from PIL import Image
+    import cv2
+
+    img = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    img = img.resize(target_size, Image.Resampling.LANCZOS)
+    return np.expand_dims(np.array(img) / 255.0, axis=0)
+
+
+@pytest.mark.parametrize("preprocessing", ["efficientnet", "unit"])
+def test_app_preprocessing_matches_legacy_float_path(images, preprocessing):
+    pytest.importorskip("flask")
+    pytest.importorskip("PIL")
+    import app
+
+    classifier, autoencoder = _classifier(), _autoencoder()
+    class_size, ae_size = (32, 32), (16, 16)
+
+    class_batch = np.concatenate([app.preprocess_for_classifier(img, class_size) for img in images])
+    ae_batch = np.concatenate([app.preprocess_for_autoencoder(img, ae_size) for img in images])
+    probs = wrap_classifier(classifier, preprocessing).predict(class_batch, verbose=0)
+    errors = wrap_autoencoder(autoencoder).predict(ae_batch, verbose=0)
+
+    legacy_class = np.concatenate(
+        [_legacy_preprocess_for_classifier(img, class_size, preprocessing) for img in images]
+    )
+    legacy_ae = np.concatenate([_legacy_preprocess_for_autoencoder(img, ae_size) for img in images])
+    legacy_probs = classifier.predict(legacy_class, verbose=0)
+    legacy_recon = autoencoder.predict(legacy_ae, verbose=0)
+    legacy_errors = np.mean((legacy_ae - legacy_recon) ** 2, axis=(1, 2, 3))
+
+    np.testing.assert_allclose(probs, legacy_probs, atol=1e-4)
+    np.testing.assert_array_equal(probs.argmax(1), legacy_probs.argmax(1))
+    np.testing.assert_allclose(errors, legacy_errors, atol=1e-4)
+
+
+def test_ensure_uint8_input_wraps_each_model_type():
+    classifier = ensure_uint8_input(_classifier())
+    autoencoder = ensure_uint8_input(_autoencoder())
+
+    assert takes_uint8(classifier) and takes_uint8(autoencoder)
+    assert classifier.output_shape == (None, 4)
+    assert autoencoder.output_shape == (None,)
+    assert ensure_uint8_input(classifier) is classifier
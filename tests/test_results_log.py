@@ -0,0 +1,63 @@
+"""
+Round trip of analysis results through the results log (src/results_log.py).
+"""
+
+import time
+
+import pytest
+
+from src.degradation import DegradationLevel
+from src.results_log import ResultsLog
+
+
+def _app_result(waste_type, confidence, is_anomaly, level):
+    return {
+        "success": True,
+        "detection": None,
+        "classification": {"waste_type": waste_type, "confidence": confidence},
+        "anomaly": {"is_anomaly": is_anomaly, "reconstruction_error": 0.01},
+        "degradation": level.to_dict()
+    }
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = ResultsLog(tmp_path, flush_interval=0.05)
+    log.start()
+    yield log
+    log.close()
+
+
+def test_records_keep_their_degradation_level(log):
+    now = time.time()
+    full = DegradationLevel(0, "full")
+    degraded = DegradationLevel(2, "classifier_only", detection=False, anomaly=False)
+
+    log.record(_app_result("organic", 0.9, False, full), timestamp=now)
+    log.record({"waste_type": "general", "confidence": 0.6, "is_anomaly": False,
+                "anomaly_score": None, "degradation": degraded.to_dict()}, timestamp=now)
+    log.close()
+
+    records = log.read_records(now - 1, now + 1)
+    assert sorted(records["level"].tolist()) == [0, 2]
+    assert sorted(records["anomaly"].tolist()) == [-1, 0]
+
+
+def test_hourly_aggregates_match_records(log):
+    now = time.time()
+    level = DegradationLevel(0, "full")
+    for i in range(20):
+        log.record(_app_result("recyclable" if i % 2 else "e-waste", 0.55, i % 5 == 0, level),
+                   timestamp=now - i)
+    log.close()
+
+    counts = {}
+    for row in log.hourly_counts(now - 3600, now + 1):
+        counts[row["class"]] = counts.get(row["class"], 0) + row["count"]
+    summary = log.summary(now - 86400, now + 1)
+
+    assert sum(counts.values()) == 20
+    assert summary["e-waste"]["count"] == 10
+    assert summary["e-waste"]["anomaly_rate"] == pytest.approx(0.2)  # i = 0 and 10
+    assert summary["recyclable"]["confidence_histogram"][5] == 10
+    assert log.stats()["dropped"] == 0